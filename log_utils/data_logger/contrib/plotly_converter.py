@@ -15,6 +15,9 @@ class PlotlyConverter(DataConverterBase):
     def is_supported(self, obj) -> bool:
         return isinstance(obj, PlotlyFigure)
 
+    def conversion_key(self):
+        return type(self)
+
     def to_buffer(self, obj) -> bytes:
         str_div = plot(obj.plotly_dict, output_type='div', auto_open=False)
         return str_div.encode('utf8')
@@ -1,27 +1,91 @@
 import json
-from dataclasses import asdict, is_dataclass
+from dataclasses import fields, is_dataclass
+from typing import Dict, Tuple, Hashable
 
 from log_utils.data_logger.converters import DataConverterBase
 
+# Names of the fields of each dataclass type seen so far - resolved once per class instead of once per object
+_FIELD_PLANS = {}  # type: Dict[type, Tuple[str, ...]]
+
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _get_field_plan(cls) -> Tuple[str, ...]:
+    plan = _FIELD_PLANS.get(cls)
+    if plan is None:
+        plan = tuple(field.name for field in fields(cls))
+        _FIELD_PLANS[cls] = plan
+
+    return plan
+
+
+def dataclass_to_dict(obj):
+    """
+        Same result as `dataclasses.asdict(...)`, without deep-copying the leaf values
+        The field names of every dataclass type are looked up once and cached
+    """
+    cls = type(obj)
+    if cls in _SCALAR_TYPES:
+        return obj
+
+    if cls in _FIELD_PLANS or (is_dataclass(obj) and not isinstance(obj, type)):
+        return {name: dataclass_to_dict(getattr(obj, name)) for name in _get_field_plan(cls)}
+
+    if isinstance(obj, tuple) and hasattr(obj, '_fields'):  # namedtuple
+        return cls(*[dataclass_to_dict(value) for value in obj])
+
+    if isinstance(obj, (list, tuple)):
+        return cls(dataclass_to_dict(value) for value in obj)
+
+    if isinstance(obj, dict):
+        return cls((dataclass_to_dict(key), dataclass_to_dict(value)) for key, value in obj.items())
+
+    return obj
+
 
 class DataclassConverter(DataConverterBase):
     """
         Convert dataclasses to string with a serializer such as `json.dumps(...)`
         Optionally provide your own serializer, e.g,: `dumps_function=yaml.dumps`
+
+        Use `compact=True` for single-line JSON, e.g. for aggregation with `JsonLinesHandler`
     """
 
-    def __init__(self, *, dumps_function=None):
-        if not dumps_function:
-            dumps_function = lambda x: json.dumps(x, indent=2)
+    def __init__(self, *, dumps_function=None, compact=False):
+        if compact:
+            self._dumps_function_default = lambda x: json.dumps(x, separators=(',', ':'))
+        else:
+            self._dumps_function_default = lambda x: json.dumps(x, indent=2)
 
         super().__init__()
-        self.indent = 2
+        self.indent = None if compact else 2
         self.suggested_extension = '.json'
-        self.dumps_function = dumps_function
+        self.dumps_function = dumps_function or self._dumps_function_default
 
     def to_buffer(self, obj) -> bytes:
-        yaml_str = self.dumps_function(asdict(obj))
+        yaml_str = self.dumps_function(dataclass_to_dict(obj))
         return yaml_str.encode()  # as UTF8
 
+    def from_buffer(self, buffer: bytes) -> dict:
+        """
+            :return: The fields as a dict (the dataclass type isn't saved), only for the default JSON serializer
+        """
+        if self.dumps_function is not self._dumps_function_default:
+            return super().from_buffer(buffer)
+
+        return json.loads(bytes(buffer).decode())
+
     def is_supported(self, obj) -> bool:
         return is_dataclass(obj)
+
+    def is_compact_json(self) -> bool:
+        """
+            Whether the buffers are single-line JSON by construction - of the default serializer with `compact=True`
+        """
+        return self.indent is None and self.dumps_function is self._dumps_function_default
+
+    def conversion_key(self) -> Hashable:
+        if self.dumps_function is self._dumps_function_default:
+            return type(self), self.indent
+
+        return type(self), self.dumps_function
@@ -3,7 +3,7 @@ from io import BytesIO
 
 # This handler is optional
 # noinspection PyPackageRequirements
-from typing import Optional, Callable
+from typing import Optional, Callable, Hashable
 
 from matplotlib import pyplot
 # noinspection PyPackageRequirements
@@ -35,6 +35,23 @@ class MatplotlibConverter(DataConverterBase):
     def is_supported(self, obj) -> bool:
         return isinstance(obj, Figure)
 
+    def from_buffer(self, buffer: bytes):
+        """
+            :return: The figure for the 'pickle' format, otherwise the image as an array (RGB/RGBA)
+        """
+        if self.save_fig_file_format == 'pickle':
+            return pickle.loads(buffer)
+
+        return pyplot.imread(BytesIO(buffer), format=self.save_fig_file_format)
+
+    def conversion_key(self) -> Hashable:
+        # Converters that close the figure (should_close) don't share buffers with ones that leave it open, so it's
+        # closed whenever any of the converters should close it
+        if self.save_fig_file_format is None:
+            return self
+
+        return type(self), self.save_fig_file_format, self.hook_transform_figure, self.should_close
+
     def to_buffer(self, obj):
         fig = obj
         memory_stream = BytesIO()
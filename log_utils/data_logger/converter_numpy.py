@@ -0,0 +1,33 @@
+from io import BytesIO
+
+# This converter is optional
+# noinspection PyPackageRequirements
+import numpy as np
+
+from log_utils.data_logger.converters import DataConverterBase
+
+
+class NumpyArrayConverter(DataConverterBase):
+    """
+        Save arrays losslessly as `.npy` files, any shape and dtype (except object arrays)
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.suggested_extension = '.npy'
+
+    def is_supported(self, obj) -> bool:
+        return isinstance(obj, np.ndarray) and not obj.dtype.hasobject
+
+    def to_buffer(self, obj: np.ndarray) -> bytes:
+        memory_file = BytesIO()
+        np.save(memory_file, obj, allow_pickle=False)
+
+        return memory_file.getvalue()
+
+    def from_buffer(self, buffer: bytes) -> np.ndarray:
+        return np.load(BytesIO(buffer), allow_pickle=False)
+
+    def conversion_key(self):
+        return type(self)
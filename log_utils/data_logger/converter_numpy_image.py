@@ -17,10 +17,16 @@ class NumpyImageConverter(DataConverterBase):
             return True
         return False
 
+    def conversion_key(self):
+        return type(self), self.suggested_extension
+
     def to_buffer(self, obj) -> bytes:
         success, buffer = cv2.imencode(self.suggested_extension, obj)
         if not success:
             raise Exception("error compressing numpy image to {} format".format(self.suggested_extension))
         return buffer
 
+    def from_buffer(self, buffer: bytes) -> np.ndarray:
+        return cv2.imdecode(np.frombuffer(buffer, np.uint8), cv2.IMREAD_UNCHANGED)
+
 
@@ -0,0 +1,47 @@
+import marshal
+
+from log_utils.data_logger.converters import DataConverterBase
+from log_utils.helper import ProfileResult
+
+
+class PstatsConverter(DataConverterBase):
+    """
+        Save cProfile results of `PerformanceProfiler` as `.pstats` files, e.g. for `pstats.Stats(path)` or snakeviz
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.suggested_extension = '.pstats'
+
+    def is_supported(self, obj) -> bool:
+        return isinstance(obj, ProfileResult) and obj.stats is not None
+
+    def to_buffer(self, obj: ProfileResult) -> bytes:
+        # Same format as `pstats.Stats.dump_stats(...)`
+        return marshal.dumps(obj.stats)
+
+    def conversion_key(self):
+        return type(self)
+
+
+class CollapsedStackConverter(DataConverterBase):
+    """
+        Save sampled stacks of `PerformanceProfiler` in the collapsed format ("frame;frame;frame count" per line),
+        which is the input of flame graph tools such as `flamegraph.pl` or speedscope
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.suggested_extension = '.folded'
+
+    def is_supported(self, obj) -> bool:
+        return isinstance(obj, ProfileResult) and obj.stacks is not None
+
+    def to_buffer(self, obj: ProfileResult) -> bytes:
+        lines = ['{} {}\n'.format(stack, count) for stack, count in sorted(obj.stacks.items())]
+        return ''.join(lines).encode('utf8')
+
+    def conversion_key(self):
+        return type(self)
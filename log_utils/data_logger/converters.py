@@ -1,8 +1,9 @@
 import abc
 import array
 import pickle
+import threading
 from io import BytesIO
-from typing import Optional
+from typing import Optional, Hashable, List, Union
 
 
 class DataConverterBase(metaclass=abc.ABCMeta):
@@ -17,6 +18,25 @@ class DataConverterBase(metaclass=abc.ABCMeta):
     def to_buffer(self, obj) -> Optional[bytes]:
         raise NotImplementedError()
 
+    def from_buffer(self, buffer: bytes):
+        """
+            Inverse of `to_buffer(...)` - for reading logged data back, not supported by default
+        """
+        raise NotImplementedError('{} can\'t read buffers back'.format(type(self).__name__))
+
+    def conversion_key(self) -> Hashable:
+        """
+            Converters of equal keys produce equal buffers, so each object is converted once per record by all of them
+            (see `ConversionCache`). By default that's the converter itself, override to return its configuration.
+        """
+        return self
+
+    def get_extension(self, obj) -> str:
+        """
+            Extension of the file for the buffer of the given object, the same one for all objects by default
+        """
+        return self.suggested_extension
+
 
 class TextConverter(DataConverterBase):
     def __init__(self, encoding='utf8', errors='strict'):
@@ -32,6 +52,12 @@ class TextConverter(DataConverterBase):
     def to_buffer(self, obj: str) -> bytes:
         return obj.encode(self.encoding, self.errors)
 
+    def from_buffer(self, buffer: bytes) -> str:
+        return bytes(buffer).decode(self.encoding, self.errors)
+
+    def conversion_key(self) -> Hashable:
+        return type(self), self.encoding, self.errors
+
 
 class BinaryConverter(DataConverterBase):
     def __init__(self):
@@ -43,6 +69,12 @@ class BinaryConverter(DataConverterBase):
     def to_buffer(self, obj) -> bytes:
         return obj
 
+    def from_buffer(self, buffer: bytes) -> bytes:
+        return bytes(buffer)
+
+    def conversion_key(self) -> Hashable:
+        return type(self)
+
 
 class PickleConverter(DataConverterBase):
     def __init__(self):
@@ -56,5 +88,103 @@ class PickleConverter(DataConverterBase):
 
         return memory_file.getvalue()
 
+    def from_buffer(self, buffer: bytes):
+        return pickle.loads(buffer)
+
     def is_supported(self, obj) -> bool:
         return True
+
+    def conversion_key(self) -> Hashable:
+        return type(self)
+
+
+class RawBuffer:
+    """
+        Data that was already converted to bytes, e.g. elsewhere, or by another process
+    """
+
+    def __init__(self, buffer: bytes, extension: str):
+        self.buffer = buffer
+        self.extension = extension
+
+
+class RawRecord:
+    """
+        All the buffers a record was converted to (e.g. by another process), handled together as a single record - so
+        the files of its buffers share a name, differing only by extension
+    """
+
+    def __init__(self, buffers: List[RawBuffer]):
+        self.buffers = buffers
+
+
+class RawBufferConverter(DataConverterBase):
+    """
+        Pass `RawBuffer`s through as they are. For a `RawRecord` the handlers use `split(...)`, to handle each of its
+        buffers as if converted by a converter of its own
+    """
+
+    def is_supported(self, obj) -> bool:
+        return isinstance(obj, (RawBuffer, RawRecord))
+
+    @staticmethod
+    def split(obj) -> List[RawBuffer]:
+        return obj.buffers if isinstance(obj, RawRecord) else [obj]
+
+    def to_buffer(self, obj: Union[RawBuffer, RawRecord]) -> bytes:
+        # Handlers that don't split records take the first buffer
+        return self.split(obj)[0].buffer
+
+    def get_extension(self, obj: Union[RawBuffer, RawRecord]) -> str:
+        return self.split(obj)[0].extension
+
+    def conversion_key(self) -> Hashable:
+        return type(self)
+
+
+class ConversionCache:
+    """
+        Buffers converted while a single record is handled, shared by all of its handlers - so an object is converted
+        once per distinct converter (by `conversion_key()`), regardless of the number of handlers
+
+        The cache of the record being handled is kept per thread, the shared buffers should be treated as read-only
+
+        with ConversionCache(data):
+            buffer = ConversionCache.convert(converter, data)
+    """
+
+    _local = threading.local()
+
+    def __init__(self, data) -> None:
+        self.data = data
+        self.buffers = {}
+
+    def __enter__(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        stack.append(self)
+        return self
+
+    def __exit__(self, t, value, tb):
+        self._local.stack.pop()
+
+    @classmethod
+    def convert(cls, converter: DataConverterBase, obj):
+        """
+            :return: `converter.to_buffer(obj)`, cached if `obj` is the data of the record being handled
+        """
+        stack = getattr(cls._local, 'stack', None)
+        if not stack or stack[-1].data is not obj:
+            return converter.to_buffer(obj)
+
+        buffers = stack[-1].buffers
+        key = converter.conversion_key()
+        try:
+            return buffers[key]
+        except KeyError:
+            buffer = buffers[key] = converter.to_buffer(obj)
+            return buffer
+        except TypeError:  # Unhashable configuration
+            return converter.to_buffer(obj)
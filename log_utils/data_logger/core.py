@@ -1,8 +1,11 @@
 import logging
+import threading
 import time
-from typing import List, Union, Iterable
+from typing import List, Union, Tuple
 
+from .converters import ConversionCache
 from .handlers import DataHandlerBase
+from ..helper import ThreadLocalAccumulator
 
 
 # noinspection PyPep8Naming
@@ -10,20 +13,38 @@ class DataLogger(logging.Logger):
     def __init__(self, name='', level=logging.NOTSET) -> None:
         super().__init__(name, level)
 
-        self.handlers_data = []  # type: List[DataHandlerBase]
+        # Immutable, replaced on change - so records are handled without locking, by a consistent snapshot
+        self.handlers_data = ()  # type: Tuple[DataHandlerBase, ...]
+        self._lock_handlers_data = threading.Lock()
 
         self.verbose_generation_timing = False
-        self.time_overhead_generation_sec = 0.0
+        self._time_overhead_generation = ThreadLocalAccumulator(0.0)
+
+    @property
+    def time_overhead_generation_sec(self) -> float:
+        return self._time_overhead_generation.value
+
+    @time_overhead_generation_sec.setter
+    def time_overhead_generation_sec(self, value: float):
+        self._time_overhead_generation.value = value
 
     def addHandler(self, handler: Union[logging.Handler, DataHandlerBase]):
         """
             :param handler: Either a regular log handler, or a data handler
         """
         if isinstance(handler, DataHandlerBase):
-            self.handlers_data.append(handler)
+            with self._lock_handlers_data:
+                self.handlers_data = self.handlers_data + (handler,)
         else:
             super().addHandler(handler)
 
+    def removeHandler(self, handler: Union[logging.Handler, DataHandlerBase]):
+        if isinstance(handler, DataHandlerBase):
+            with self._lock_handlers_data:
+                self.handlers_data = tuple(h for h in self.handlers_data if h is not handler)
+        else:
+            super().removeHandler(handler)
+
     def _log(self, level, msg, args, **kwargs):
         data = kwargs.pop('data', None)
 
@@ -35,9 +56,8 @@ class DataLogger(logging.Logger):
 
         self._handleData(level, msg, data, self)
 
-    def _getHierarchyDataHandlers(self) -> Iterable[DataHandlerBase]:
-        handlers_data = []
-        handlers_data += self.handlers_data
+    def _getHierarchyDataHandlers(self) -> List[DataHandlerBase]:
+        handlers_data = list(self.handlers_data)
 
         # Collect data loggers from entire hierarchy
         current_parent = self.parent
@@ -59,20 +79,22 @@ class DataLogger(logging.Logger):
             if level >= handler.level
         ]
 
-        # Prepare data only if any handlers exist
-        if callable(data) and len(handlers) > 0:
+        # Prepare data only if any handlers require it
+        if callable(data) and any(not handler.accepts_lazy_data for handler in handlers):
             time_start_sec = time.perf_counter()
             data = data()
             time_generation = time.perf_counter() - time_start_sec
-            self.time_overhead_generation_sec += time_generation
+            self._time_overhead_generation.add(time_generation)
 
             if self.verbose_generation_timing:
                 message_logger.debug(
                     'Time of in-memory log-data evaluation: {:.3f} [sec]'.format(time_generation)
                 )
 
-        for handler in handlers:
-            handler.handle(level, msg, data, message_logger)
+        # Each object is converted once per distinct converter, and shared by all the handlers
+        with ConversionCache(data):
+            for handler in handlers:
+                handler.handle(level, msg, data, message_logger)
 
         # Log messages that were not handled
         if len(handlers) == 0:
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Durability modes of `SaveToDirHandler`, from fastest to safest
+DURABILITY_FAST = 'fast'  # Write in place, a crash may leave a truncated file
+DURABILITY_ATOMIC = 'atomic'  # Write to a temporary file and rename, the file is either complete or missing
+DURABILITY_DURABLE = 'durable'  # Atomic, and flushed to disk (file & directory) before the write returns
+
+DURABILITY_MODES = (DURABILITY_FAST, DURABILITY_ATOMIC, DURABILITY_DURABLE)
+
+
+def temp_path(path_file: Path) -> Path:
+    """
+        Hidden temporary file in the same directory (so renaming is atomic), unique per process & thread
+    """
+    return path_file.with_name('.{}.{}-{}.tmp'.format(path_file.name, os.getpid(), threading.get_ident()))
+
+
+def finalize_temp_file(path_temp: Path, path_file: Path, should_overwrite: bool) -> None:
+    """
+        Atomically move a written temporary file to its final path
+    """
+    try:
+        if should_overwrite:
+            os.replace(str(path_temp), str(path_file))
+            return
+
+        # Linking fails if the destination exists - the exclusive counterpart of rename
+        try:
+            os.link(str(path_temp), str(path_file))
+        except FileExistsError:
+            raise Exception('File already exist, overwrite disallowed')
+    finally:
+        if path_temp.exists():
+            path_temp.unlink()
+
+
+def write_atomic(path_file: Path, buffer, should_overwrite=True) -> None:
+    path_temp = temp_path(path_file)
+    try:
+        path_temp.write_bytes(buffer)
+    except Exception:
+        if path_temp.exists():
+            path_temp.unlink()
+        raise
+
+    finalize_temp_file(path_temp, path_file, should_overwrite)
+
+
+def fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _PendingCommit:
+    __slots__ = ('path_temp', 'path_file', 'should_overwrite', 'event', 'error')
+
+    def __init__(self, path_temp: Path, path_file: Path, should_overwrite: bool) -> None:
+        self.path_temp = path_temp
+        self.path_file = path_file
+        self.should_overwrite = should_overwrite
+        self.event = threading.Event()
+        self.error = None  # type: Optional[Exception]
+
+
+class GroupCommitter:
+    """
+        Makes written files durable in groups, by a background thread: All the files pending when a commit starts are
+        fsync-ed, renamed to their final paths, and then each of their directories is fsync-ed once
+
+        Writers block until the commit that includes their file completes. Concurrent writers share commits, so the
+        cost of syncing the directory is paid once per group rather than once per file.
+
+        A forked child process starts its own background thread, the files pending in the parent are left to it
+
+        :param window_sec: Delay before each commit to gather more files into the group - trading latency for
+            throughput. With 0, the group holds whatever arrived while the previous commit was in progress.
+    """
+
+    def __init__(self, window_sec=0.0) -> None:
+        self.window_sec = window_sec
+        self.n_commits = 0
+
+        self._is_closed = False
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        self._pending = []  # type: List[_PendingCommit]
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def _check_fork(self):
+        # Threads aren't inherited by forked processes, and the state of the lock is unknown - so start over
+        if self._pid != os.getpid():
+            self._reset()
+
+    def write(self, path_file: Path, buffer, should_overwrite=True) -> None:
+        """
+            Write a file durably, returns once it was committed
+        """
+        path_temp = temp_path(path_file)
+        try:
+            path_temp.write_bytes(buffer)
+        except Exception:
+            if path_temp.exists():
+                path_temp.unlink()
+            raise
+
+        pending = _PendingCommit(path_temp, path_file, should_overwrite)
+        self._check_fork()
+        with self._condition:
+            if self._is_closed:
+                path_temp.unlink()
+                raise Exception('Group committer is closed')
+
+            self._pending.append(pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='GroupCommitter', daemon=True)
+                self._thread.start()
+
+            self._condition.notify()
+
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    def close(self) -> None:
+        """
+            Commit the pending files and stop the background thread
+        """
+        self._check_fork()
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while len(self._pending) == 0 and not self._is_closed:
+                    self._condition.wait()
+
+                if len(self._pending) == 0:
+                    return
+
+            if self.window_sec > 0:
+                time.sleep(self.window_sec)
+
+            with self._condition:
+                batch, self._pending = self._pending, []
+
+            self._commit(batch)
+
+    def _commit(self, batch: List[_PendingCommit]):
+        pending_by_dir = {}
+        for pending in batch:
+            # noinspection PyBroadException
+            try:
+                fsync_path(str(pending.path_temp))
+                finalize_temp_file(pending.path_temp, pending.path_file, pending.should_overwrite)
+                pending_by_dir.setdefault(str(pending.path_file.parent), []).append(pending)
+            except Exception as e:
+                pending.error = e
+                if pending.path_temp.exists():
+                    pending.path_temp.unlink()
+
+        # Persist the renames - Directories can't be opened for fsync on Windows, where renames are journaled anyway
+        if os.name != 'nt':
+            for path_dir, pending_list in pending_by_dir.items():
+                # noinspection PyBroadException
+                try:
+                    fsync_path(path_dir)
+                except Exception as e:
+                    for pending in pending_list:
+                        pending.error = e
+
+        self.n_commits += 1
+        for pending in batch:
+            pending.event.set()
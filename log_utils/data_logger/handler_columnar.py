@@ -0,0 +1,229 @@
+import json
+import logging
+import numbers
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Union, Dict, Tuple
+
+# This handler is optional
+# noinspection PyPackageRequirements
+import numpy as np
+
+from .handlers import DataHandlerBase, PathGeneratorDefault, PrefixGeneratorCounting
+from ..helper import LogHelper
+
+COLUMN_TIME = 'time'
+COLUMN_VALUE = 'value'
+_COLUMN_LOGGER = '__logger__'
+_COLUMN_MSG = '__msg__'
+_COLUMN_NAMES = '__names__'
+_COLUMN_ARRAY_FORMAT = 'column_{}'
+
+# Names of the columns written by the handler itself, samples can't use them
+RESERVED_COLUMNS = frozenset((COLUMN_TIME, _COLUMN_LOGGER, _COLUMN_MSG))
+
+
+class _SeriesBuffer:
+    """
+        Typed column buffers of a single series (logger name + message), all columns are of the same length
+    """
+
+    __slots__ = ('times', 'columns')
+
+    def __init__(self) -> None:
+        self.times = array('d')
+        self.columns = {}  # type: Dict[str, array]
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time_sec: float, values: dict):
+        n_samples = len(self.times)
+        self.times.append(time_sec)
+
+        for name, value in values.items():
+            column = self.columns.get(name)
+            if column is None:
+                # Column first seen now, earlier samples are missing
+                column = self.columns[name] = array('d', [float('nan')]) * n_samples
+
+            column.append(value)
+
+        # Columns missing from this sample
+        if len(values) < len(self.columns):
+            for name, column in self.columns.items():
+                if len(column) == n_samples:
+                    column.append(float('nan'))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {COLUMN_TIME: np.frombuffer(self.times, dtype=np.float64)}
+        for name, column in self.columns.items():
+            arrays[name] = np.frombuffer(column, dtype=np.float64)
+
+        return arrays
+
+
+class ColumnarDataHandler(DataHandlerBase):
+    """
+        Accumulate numeric records (scalars, or dicts of scalars) per logger & message into column buffers, and write
+        them in bulk as chunk files - Instead of writing a file per sample
+
+        Load the series back with `load_columnar(path_dir)`. Dict keys must be strings without commas or line breaks,
+        and not in `RESERVED_COLUMNS` - other samples are skipped
+
+        :param file_format: 'npz' or 'csv'
+        :param max_buffered_samples: Bound of samples kept in memory (for all series), reaching it triggers a flush
+    """
+
+    def __init__(self, path_dir: Union[Path, str], file_format='npz', max_buffered_samples=100000) -> None:
+        super().__init__()
+
+        if file_format not in ('npz', 'csv'):
+            raise ValueError('Unsupported file format: {}'.format(file_format))
+
+        self.path_dir = Path(path_dir)
+        self.file_format = file_format
+        self.max_buffered_samples = max_buffered_samples
+        self.time_overhead_io_sec = 0.0
+
+        self._lock = threading.Lock()
+        self._series = {}  # type: Dict[Tuple[str, str], _SeriesBuffer]
+        self._n_buffered_samples = 0
+        self._chunk_counter = PrefixGeneratorCounting()
+        self._chunk_counter.digits = 6
+
+        os.makedirs(str(self.path_dir), exist_ok=True)
+
+    @staticmethod
+    def is_supported(data) -> bool:
+        if isinstance(data, dict):
+            return all(isinstance(value, numbers.Real) for value in data.values())
+
+        return isinstance(data, numbers.Real)
+
+    @staticmethod
+    def is_valid_column_name(name) -> bool:
+        return (
+            isinstance(name, str) and name not in RESERVED_COLUMNS
+            and ',' not in name and '\n' not in name and '\r' not in name
+        )
+
+    def handle(self, level, msg, data_obj, logger: logging.Logger) -> None:
+        if not self.is_supported(data_obj):
+            logger.log(level, msg + ' (Not numeric, unsupported by columnar handler)')
+            return
+
+        if isinstance(data_obj, dict) and not all(self.is_valid_column_name(name) for name in data_obj):
+            invalid_names = [name for name in data_obj if not self.is_valid_column_name(name)]
+            logger.log(level, '{} (Invalid column names for columnar handler: {})'.format(
+                msg, ', '.join(repr(name) for name in invalid_names)
+            ))
+            return
+
+        values = data_obj if isinstance(data_obj, dict) else {COLUMN_VALUE: data_obj}
+        time_sec = time.time()
+
+        with self._lock:
+            key = (logger.name, msg)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _SeriesBuffer()
+
+            series.append(time_sec, values)
+            self._n_buffered_samples += 1
+
+            if self._n_buffered_samples >= self.max_buffered_samples:
+                # noinspection PyBroadException
+                try:
+                    self._flush()
+                except Exception as e:
+                    logger.log(level, '{} (Unable to write columnar chunks; Exception: {})'.format(msg, e))
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        time_start_sec = time.perf_counter()
+        str_timestamp = LogHelper.timestamp(with_ms=True)
+
+        try:
+            for (logger_name, msg), series in self._series.items():
+                if len(series) == 0:
+                    continue
+
+                filename = '{}.{}.{}.{}'.format(
+                    PathGeneratorDefault.sanitize_filename(logger_name + ' ' + msg),
+                    str_timestamp, self._chunk_counter.generate().strip(), self.file_format
+                )
+                self._write_chunk(self.path_dir / filename, logger_name, msg, series.to_arrays())
+        finally:
+            # Drop the buffers (the written arrays are views on them) - also on failure, so written chunks aren't
+            # written again by the next flush
+            self._series = {}
+            self._n_buffered_samples = 0
+
+            self.time_overhead_io_sec += time.perf_counter() - time_start_sec
+
+    def _write_chunk(self, path_file: Path, logger_name: str, msg: str, arrays: Dict[str, np.ndarray]):
+        if self.file_format == 'npz':
+            # Columns are stored by index, their names aren't valid as `savez` keywords (e.g. 'file')
+            np.savez(str(path_file), **{
+                _COLUMN_LOGGER: np.array(logger_name), _COLUMN_MSG: np.array(msg), _COLUMN_NAMES: np.array(list(arrays))
+            }, **{_COLUMN_ARRAY_FORMAT.format(i): column for i, column in enumerate(arrays.values())})
+        else:
+            header = json.dumps({'logger': logger_name, 'msg': msg}) + '\n' + ','.join(arrays.keys())
+            np.savetxt(
+                str(path_file), np.column_stack(list(arrays.values())),
+                fmt='%.17g', delimiter=',', header=header, comments=''
+            )
+
+
+def _read_chunk(path_file: Path) -> Tuple[Tuple[str, str], Dict[str, np.ndarray]]:
+    if path_file.suffix == '.npz':
+        with np.load(str(path_file)) as npz:
+            key = (str(npz[_COLUMN_LOGGER]), str(npz[_COLUMN_MSG]))
+            arrays = {str(name): npz[_COLUMN_ARRAY_FORMAT.format(i)] for i, name in enumerate(npz[_COLUMN_NAMES])}
+
+        return key, arrays
+
+    with open(str(path_file), 'r') as file:
+        meta = json.loads(file.readline())
+        names = file.readline().strip().split(',')
+        values = np.loadtxt(file, delimiter=',', ndmin=2).reshape(-1, len(names))
+
+    return (meta['logger'], meta['msg']), {name: values[:, i] for i, name in enumerate(names)}
+
+
+def load_columnar(path_dir: Union[Path, str]) -> Dict[Tuple[str, str], Dict[str, np.ndarray]]:
+    """
+        Load all the chunks written by `ColumnarDataHandler` in a directory
+
+        :return: Mapping of (logger name, message) to the series columns, e.g. {'time': array, 'value': array}
+    """
+    chunks = {}
+    for path_file in sorted(Path(path_dir).iterdir()):
+        if path_file.suffix not in ('.npz', '.csv'):
+            continue
+
+        key, arrays = _read_chunk(path_file)
+        chunks.setdefault(key, []).append(arrays)
+
+    series = {}
+    for key, arrays_list in chunks.items():
+        names = []
+        for arrays in arrays_list:
+            names += [name for name in arrays if name not in names]
+
+        series[key] = {
+            name: np.concatenate([
+                arrays[name] if name in arrays else np.full(len(arrays[COLUMN_TIME]), np.nan)
+                for arrays in arrays_list
+            ])
+            for name in names
+        }
+
+    return series
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Deque, List
+
+from .converters import RawBuffer, RawBufferConverter, RawRecord
+from .handlers import DataHandlerBase
+
+
+class _Entry:
+    __slots__ = ('time', 'level', 'msg', 'data', 'logger', 'n_bytes')
+
+    def __init__(self, time_sec, level, msg, data, logger, n_bytes):
+        self.time = time_sec
+        self.level = level
+        self.msg = msg
+        self.data = data
+        self.logger = logger
+        self.n_bytes = n_bytes
+
+
+class FlightRecorderHandler(DataHandlerBase):
+    """
+        Keep the recent records of each logger in memory, and pass them to the target handler only when a record of
+        `trigger_level` (or above) arrives, or when `dump()` is called
+
+        By default the records are kept as given - callables are not evaluated unless dumped (evaluation then reflects
+        the state at the time of the dump). With `store_buffers=True` the records are converted on arrival by this
+        handler's converters, and passed to the target as `RawRecord`s (a `RawBufferConverter` is added to it).
+
+        Text records don't reach data handlers, to dump on those too attach `create_trigger_handler()` to a logger
+
+        :param capacity: Number of records kept per logger
+        :param max_age_sec: Records older than this are discarded
+        :param max_bytes: Bound of the kept buffers' size per logger, applies only with `store_buffers=True`
+    """
+
+    def __init__(self, target: DataHandlerBase, capacity=1000, max_age_sec: Optional[float] = None,
+                 max_bytes: Optional[int] = None, trigger_level=logging.ERROR, store_buffers=False) -> None:
+        super().__init__()
+
+        self.target = target
+        self.capacity = capacity
+        self.max_age_sec = max_age_sec
+        self.max_bytes = max_bytes
+        self.trigger_level = trigger_level
+        self.store_buffers = store_buffers
+        self.accepts_lazy_data = not store_buffers
+
+        if store_buffers and not any(isinstance(converter, RawBufferConverter) for converter in target.converters):
+            target.converters.insert(0, RawBufferConverter())
+
+        self._lock = threading.Lock()
+        self._records = {}  # type: Dict[str, Deque[_Entry]]
+        self._n_bytes = {}  # type: Dict[str, int]
+
+    def handle(self, level, msg, data, logger: logging.Logger) -> None:
+        n_bytes = 0
+        if self.store_buffers:
+            converters_supported = self._getSupportedConverters(data)
+            buffers = []
+            for converter in converters_supported:
+                buffer = self._convert(converter, data)
+                if buffer is not None:
+                    buffers.append(RawBuffer(buffer, converter.get_extension(data)))
+                    n_bytes += len(buffer)
+
+            if len(converters_supported) == 0:
+                logger.log(level, msg + ' (No supported converters)')
+                return
+
+            data = RawRecord(buffers)
+
+        time_now = time.time()
+        with self._lock:
+            self._append(_Entry(time_now, level, msg, data, logger, n_bytes), time_now)
+
+        if level >= self.trigger_level:
+            self.dump()
+        else:
+            logger.log(level, '{} (Kept in flight recorder)'.format(msg))
+
+    def _append(self, entry: _Entry, time_now: float):
+        records = self._records.get(entry.logger.name)
+        if records is None:
+            records = self._records[entry.logger.name] = deque()
+            self._n_bytes[entry.logger.name] = 0
+
+        records.append(entry)
+        self._n_bytes[entry.logger.name] += entry.n_bytes
+
+        # Evict by count, age and size - the last record is always kept
+        while len(records) > 1 and (
+                len(records) > self.capacity
+                or (self.max_age_sec is not None and time_now - records[0].time > self.max_age_sec)
+                or (self.max_bytes is not None and self._n_bytes[entry.logger.name] > self.max_bytes)
+        ):
+            self._n_bytes[entry.logger.name] -= records.popleft().n_bytes
+
+    def dump(self) -> None:
+        """
+            Pass all the kept records to the target handler, in order of arrival, and clear them
+        """
+        with self._lock:
+            entries = []  # type: List[_Entry]
+            for records in self._records.values():
+                entries += records
+
+            self._records = {}
+            self._n_bytes = {}
+
+        if self.max_age_sec is not None:
+            time_min = time.time() - self.max_age_sec
+            entries = [entry for entry in entries if entry.time >= time_min]
+
+        entries.sort(key=lambda entry: entry.time)
+        for entry in entries:
+            # As filtered by `DataLogger` when handling records
+            if entry.level < self.target.level:
+                continue
+
+            data = entry.data
+            if not self.store_buffers:
+                if callable(data):
+                    # noinspection PyBroadException
+                    try:
+                        data = data()
+                    except Exception as e:
+                        entry.logger.log(
+                            entry.level, '{} (Unable to evaluate data; Exception: {})'.format(entry.msg, e)
+                        )
+                        continue
+
+            self.target.handle(entry.level, entry.msg, data, entry.logger)
+
+    def create_trigger_handler(self) -> logging.Handler:
+        """
+            :return: Regular log handler that dumps the recorder on records of the trigger level
+        """
+        return _TriggerHandler(self)
+
+    def flush(self) -> None:
+        self.target.flush()
+
+    def close(self) -> None:
+        self.target.close()
+
+
+class _TriggerHandler(logging.Handler):
+    def __init__(self, recorder: FlightRecorderHandler) -> None:
+        super().__init__(recorder.trigger_level)
+        self.recorder = recorder
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.recorder.dump()
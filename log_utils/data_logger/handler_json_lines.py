@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Union, Optional
+
+from .converters import DataConverterBase, TextConverter
+from .handlers import DataHandlerBase
+
+
+class JsonLinesHandler(DataHandlerBase):
+    """
+        Append every record as a single JSON line to one rolling file, instead of creating a file per record
+
+        Each line holds the record's metadata, and the buffer of the first supported converter under "data":
+        - Buffers of `DataclassConverter(compact=True)` are spliced in as they are
+        - Other JSON buffers are validated, and spliced in if single-line, otherwise re-encoded compactly
+        - Buffers of a `TextConverter` are embedded as a JSON string
+        - Other buffers aren't appended
+
+        :param max_bytes: Roll the file over once it reaches this size, 0 to never roll over
+        :param files_count: Number of rolled over files to keep, as `<path_file>.1`, `<path_file>.2`, ...
+        :param flush_interval_sec: None to flush only when the file buffer is full (or on `flush()` / `close()`),
+            0 to flush after every record, otherwise flush on the first record after the interval passed
+    """
+
+    def __init__(self, path_file: Union[Path, str], max_bytes=0, files_count=7,
+                 flush_interval_sec: Optional[float] = None) -> None:
+        super().__init__()
+
+        self.path_file = Path(path_file)
+        self.max_bytes = max_bytes
+        self.files_count = files_count
+        self.flush_interval_sec = flush_interval_sec
+        self.time_overhead_io_sec = 0.0
+
+        self._lock = threading.Lock()
+        self._stream = None
+        self._time_last_flush = time.monotonic()
+
+        os.makedirs(str(self.path_file.parent), exist_ok=True)
+
+    def handle(self, level, msg, data_obj, logger: logging.Logger) -> None:
+        converters_supported = self._getSupportedConverters(data_obj)
+        if len(converters_supported) == 0:
+            logger.log(level, msg + ' (No supported converters)')
+            return
+
+        buffer = self._convert(converters_supported[0], data_obj)
+        if buffer is None:
+            logger.log(level, "{} (Not saved)".format(msg))
+            return
+
+        buffer = self._to_json_value(converters_supported[0], buffer)
+        if buffer is None:
+            logger.log(level, "{} (Not saved - not JSON)".format(msg))
+            return
+
+        header = json.dumps(
+            {'time': time.time(), 'logger': logger.name, 'level': logging.getLevelName(level), 'msg': msg},
+            separators=(',', ':')
+        ).encode()
+        line = b''.join((header[:-1], b',"data":', buffer, b'}\n'))
+
+        with self._lock:
+            time_start_sec = time.perf_counter()
+            self._write(line)
+            self.time_overhead_io_sec += time.perf_counter() - time_start_sec
+
+        logger.log(level, "{} (Appended to: \"{}\")".format(msg, self.path_file))
+
+    @staticmethod
+    def _to_json_value(converter: DataConverterBase, buffer) -> Optional[bytes]:
+        """
+            :return: The buffer as a single-line JSON value, None if it isn't JSON
+        """
+        if isinstance(converter, TextConverter):
+            return json.dumps(bytes(buffer).decode(converter.encoding, converter.errors)).encode()
+
+        # Trusted without parsing - the common case, parsing would add about a third to the conversion time
+        is_compact_json = getattr(converter, 'is_compact_json', None)
+        if is_compact_json is not None and is_compact_json():
+            return buffer
+
+        buffer = bytes(buffer)
+        try:
+            value = json.loads(buffer)
+        except ValueError:  # Including UnicodeDecodeError
+            return None
+
+        if b'\n' in buffer or b'\r' in buffer:
+            return json.dumps(value, separators=(',', ':')).encode()
+
+        return buffer
+
+    def _write(self, line: bytes):
+        if self._stream is None:
+            self._stream = open(str(self.path_file), 'ab')
+
+        if self.max_bytes > 0 and self._stream.tell() > 0 and self._stream.tell() + len(line) > self.max_bytes:
+            self._rollover()
+
+        self._stream.write(line)
+
+        if self.flush_interval_sec is not None:
+            time_now = time.monotonic()
+            if time_now - self._time_last_flush >= self.flush_interval_sec:
+                self._stream.flush()
+                self._time_last_flush = time_now
+
+    def _rollover(self):
+        self._stream.close()
+
+        # Shift older files: <path>.N-1 -> <path>.N, ..., <path> -> <path>.1
+        for index in range(self.files_count - 1, 0, -1):
+            path_src = '{}.{}'.format(self.path_file, index)
+            if os.path.exists(path_src):
+                os.replace(path_src, '{}.{}'.format(self.path_file, index + 1))
+
+        if self.files_count > 0:
+            os.replace(str(self.path_file), '{}.1'.format(self.path_file))
+        else:
+            os.remove(str(self.path_file))
+
+        self._stream = open(str(self.path_file), 'ab')
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.flush()
+                self._time_last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
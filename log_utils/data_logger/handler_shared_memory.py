@@ -0,0 +1,279 @@
+"""
+    Log large arrays from worker processes through a central process, passing them in shared memory instead of pickling
+
+    receiver = SharedMemoryReceiver(central_data_logger)
+    worker = multiprocessing.Process(target=work, args=(receiver.create_handler(),))
+    worker.start()
+    receiver.run([worker])  # Until all the handlers were closed, or their processes exited
+
+    def work(handler):
+        logger = DataLogger('Worker', logging.DEBUG)
+        logger.addHandler(handler)
+        logger.debug('Frame', data=np.zeros((1080, 1920, 3), np.uint8))
+        handler.close()
+
+    Requires Python 3.8+ (`multiprocessing.shared_memory`)
+"""
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Iterable
+
+# This handler is optional
+# noinspection PyPackageRequirements
+import numpy as np
+
+from .core import DataLogger
+from .handlers import DataHandlerBase
+
+_MESSAGE_ARRAY = 'array'
+_MESSAGE_OBJECT = 'object'
+_MESSAGE_DESTROYED = 'destroyed'
+_MESSAGE_CLOSED = 'closed'
+
+
+def _attach(name: str) -> SharedMemory:
+    # Blocks are owned (and unlinked) by the worker that created them
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+
+    return SharedMemory(name)
+
+
+class SharedMemoryDataHandler(DataHandlerBase):
+    """
+        Worker side - Copy arrays into a pool of shared memory blocks, and send only their descriptors to the receiver
+        Other data is sent pickled through the queue.
+
+        A block is reused once the receiver has handled its record. With all `max_blocks` blocks in use, logging waits
+        for the receiver to release one. Create with `SharedMemoryReceiver.create_handler()`.
+    """
+
+    def __init__(self, worker_id: int, queue_records, queue_release, max_blocks=8, min_block_size=1 << 20):
+        super().__init__()
+
+        self.worker_id = worker_id
+        self.max_blocks = max_blocks
+        self.min_block_size = min_block_size
+
+        self._queue_records = queue_records
+        self._queue_release = queue_release
+        self._blocks = {}  # type: Dict[str, SharedMemory]
+        self._blocks_free = []  # type: List[str]
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if len(state['_blocks']) > 0:
+            raise TypeError('Handler can be passed to another process only before use')
+
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def handle(self, level, msg, data, logger: logging.Logger) -> None:
+        if isinstance(data, np.ndarray) and not data.dtype.hasobject and data.nbytes > 0:
+            with self._lock:
+                block = self._acquire(data.nbytes)
+            np.ndarray(data.shape, data.dtype, buffer=block.buf)[...] = data
+
+            self._queue_records.put(
+                (_MESSAGE_ARRAY, self.worker_id, logger.name, level, msg, (block.name, data.shape, data.dtype.str))
+            )
+        else:
+            self._queue_records.put((_MESSAGE_OBJECT, self.worker_id, logger.name, level, msg, data))
+
+    def _release_pending(self, block: bool, timeout: Optional[float] = None) -> bool:
+        """
+            :return: Whether any block was released
+        """
+        is_released = False
+        while True:
+            try:
+                name = self._queue_release.get(block=block and not is_released, timeout=timeout)
+            except queue.Empty:
+                return is_released
+
+            self._blocks_free.append(name)
+            is_released = True
+
+    def _acquire(self, n_bytes: int) -> SharedMemory:
+        self._release_pending(block=False)
+        while True:
+            blocks_fit = [name for name in self._blocks_free if self._blocks[name].size >= n_bytes]
+            if len(blocks_fit) > 0:
+                name = min(blocks_fit, key=lambda block_name: self._blocks[block_name].size)
+                self._blocks_free.remove(name)
+                return self._blocks[name]
+
+            # Make room by replacing a free block that is too small
+            if len(self._blocks) >= self.max_blocks and len(self._blocks_free) > 0:
+                self._destroy(self._blocks_free.pop())
+
+            if len(self._blocks) < self.max_blocks:
+                block = SharedMemory(create=True, size=max(n_bytes, self.min_block_size))
+                self._blocks[block.name] = block
+                return block
+
+            # Backpressure - all blocks are in use
+            self._release_pending(block=True)
+
+    def _destroy(self, name: str):
+        block = self._blocks.pop(name)
+        block.close()
+        block.unlink()
+
+        # Let the receiver unmap it too
+        self._queue_records.put((_MESSAGE_DESTROYED, self.worker_id, None, None, None, name))
+
+    def close(self) -> None:
+        """
+            Wait for the receiver to handle all the sent records, and free the blocks
+        """
+        with self._lock:
+            while len(self._blocks_free) < len(self._blocks):
+                self._release_pending(block=True)
+
+            for name in list(self._blocks):
+                self._destroy(name)
+            self._blocks_free = []
+
+            self._queue_records.put((_MESSAGE_CLOSED, self.worker_id, None, None, None, None))
+
+
+class SharedMemoryReceiver:
+    """
+        Central side - Receive the records of `SharedMemoryDataHandler`s, and handle them by the data handlers of the
+        given logger (and its parents), as if logged by loggers of the same names (children of the given logger)
+
+        Arrays are passed to the handlers as read-only views on the shared memory, which are valid only during the
+        handling - handlers that keep the data for later must copy it
+
+        A worker that crashes doesn't close its handler - pass the worker processes to `run(...)` to stop waiting
+        once they all exited, the blocks of such workers are then unlinked by the receiver
+    """
+
+    def __init__(self, logger: DataLogger, context=None) -> None:
+        self.logger = logger
+
+        self._context = context or multiprocessing.get_context()
+        self._queue_records = self._context.Queue()
+        self._queues_release = []
+        self._worker_ids_open = set()
+        self._blocks = {}  # type: Dict[str, SharedMemory]
+        self._block_owners = {}  # type: Dict[str, int]
+        self._loggers_remote = {}  # type: Dict[str, DataLogger]
+
+    def create_handler(self, max_blocks=8, min_block_size=1 << 20) -> SharedMemoryDataHandler:
+        """
+            :return: Handler for a single worker process, pass it to the process on its creation
+        """
+        queue_release = self._context.Queue()
+        self._queues_release.append(queue_release)
+        worker_id = len(self._queues_release) - 1
+        self._worker_ids_open.add(worker_id)
+
+        return SharedMemoryDataHandler(worker_id, self._queue_records, queue_release, max_blocks, min_block_size)
+
+    def _get_logger(self, name: str) -> DataLogger:
+        logger_remote = self._loggers_remote.get(name)
+        if logger_remote is None:
+            logger_remote = self._loggers_remote[name] = DataLogger(name)
+            logger_remote.parent = self.logger
+
+        return logger_remote
+
+    def process(self, timeout: Optional[float] = None) -> bool:
+        """
+            Handle a single record
+            :return: False if no record arrived within the timeout
+        """
+        try:
+            kind, worker_id, name, level, msg, payload = self._queue_records.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+        if kind == _MESSAGE_CLOSED:
+            self._worker_ids_open.discard(worker_id)
+            return True
+
+        if kind == _MESSAGE_DESTROYED:
+            self._detach(payload)
+            return True
+
+        logger_remote = self._get_logger(name)
+        if kind == _MESSAGE_OBJECT:
+            # noinspection PyProtectedMember
+            logger_remote._handleData(level, msg, payload, logger_remote)
+            return True
+
+        block_name, shape, dtype = payload
+        block = self._blocks.get(block_name)
+        if block is None:
+            block = self._blocks[block_name] = _attach(block_name)
+            self._block_owners[block_name] = worker_id
+
+        try:
+            view = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            view.flags.writeable = False
+            # noinspection PyProtectedMember
+            logger_remote._handleData(level, msg, view, logger_remote)
+            del view
+        finally:
+            self._queues_release[worker_id].put(block_name)
+
+        return True
+
+    def run(self, processes: Optional[Iterable[multiprocessing.process.BaseProcess]] = None, poll_interval_sec=1.0):
+        """
+            Handle records until all the created handlers were closed
+
+            :param processes: The worker processes - if given, stop waiting once all of them exited (and their records
+                were handled), even if some didn't close their handlers. Otherwise a crashed worker blocks forever.
+        """
+        processes = None if processes is None else list(processes)
+        while len(self._worker_ids_open) > 0:
+            if self.process(timeout=None if processes is None else poll_interval_sec):
+                continue
+
+            if all(not process.is_alive() for process in processes):
+                self.logger.warning('Workers exited without closing their handlers: {}'.format(
+                    sorted(self._worker_ids_open)
+                ))
+                self._unlink_abandoned()
+                break
+
+        self.close()
+
+    def _unlink_abandoned(self):
+        """
+            Unlink the blocks of the workers that didn't close their handlers, as they would have on closing
+        """
+        for block_name, worker_id in list(self._block_owners.items()):
+            if worker_id in self._worker_ids_open:
+                try:
+                    self._blocks[block_name].unlink()
+                except FileNotFoundError:
+                    pass
+                self._detach(block_name)
+
+        self._worker_ids_open = set()
+
+    def _detach(self, block_name: str):
+        self._block_owners.pop(block_name, None)
+        block = self._blocks.pop(block_name, None)
+        if block is not None:
+            try:
+                block.close()
+            except BufferError:  # A view was kept by a handler
+                pass
+
+    def close(self):
+        for block_name in list(self._blocks):
+            self._detach(block_name)
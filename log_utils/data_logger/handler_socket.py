@@ -0,0 +1,326 @@
+"""
+    Stream data records over TCP or Unix sockets to a collector process, which writes them with any data handler
+
+    Run a collector that saves the received records to a directory:
+        python -m log_utils.data_logger.handler_socket --tcp 127.0.0.1:9020 --dir ./collected_logs
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from typing import Union, Tuple, List, Iterable, Optional, Dict
+
+from .converters import RawBuffer, RawBufferConverter, RawRecord
+from .core import DataLogger
+from .handlers import DataHandlerBase, SaveToDirHandler
+from ..helper import LogHelper
+
+# Frame: header length, payload length, JSON header (record metadata and buffer sizes), payload (the buffers)
+_FRAME_PREFIX = struct.Struct('!II')
+
+Address = Union[Tuple[str, int], str]
+
+# Extensions are received from remote clients - anything but these characters could be a path separator
+_RE_EXTENSION_UNSAFE_CHARS = re.compile(r'[^\w.\-]')
+
+
+def encode_frame(meta: dict, buffers: List[Tuple[str, bytes]]) -> bytes:
+    """
+        :param meta: JSON serializable metadata of the record
+        :param buffers: Pairs of (extension, buffer) - one for each converter that handled the record
+    """
+    header = dict(meta, extensions=[extension for extension, _ in buffers], sizes=[len(b) for _, b in buffers])
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    payload = b''.join(bytes(buffer) for _, buffer in buffers)
+
+    return _FRAME_PREFIX.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+def read_frame(stream) -> Optional[Tuple[dict, List[Tuple[str, bytes]]]]:
+    """
+        :return: Metadata and buffers of the next record, None on end of stream (including a truncated frame)
+    """
+    prefix = stream.read(_FRAME_PREFIX.size)
+    if len(prefix) < _FRAME_PREFIX.size:
+        return None
+
+    header_length, payload_length = _FRAME_PREFIX.unpack(prefix)
+    header_bytes = stream.read(header_length)
+    payload = stream.read(payload_length)
+    if len(header_bytes) < header_length or len(payload) < payload_length:
+        return None
+
+    meta = json.loads(header_bytes.decode())
+    buffers = []
+    offset = 0
+    for extension, size in zip(meta.pop('extensions'), meta.pop('sizes')):
+        buffers.append((extension, payload[offset:offset + size]))
+        offset += size
+
+    return meta, buffers
+
+
+def _connect(address: Address) -> socket.socket:
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+        return sock
+
+    sock = socket.create_connection(address)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+class SocketDataHandler(DataHandlerBase):
+    """
+        Convert records with the handler's converters and stream them to a `DataCollector`
+
+        Records are queued and sent in batches by a background thread, over a single persistent connection. While the
+        collector is unreachable the thread keeps reconnecting, and up to `max_buffered_records` records are kept.
+        Once the buffer is full, logging blocks for up to `backpressure_timeout_sec` (None - until there's room, 0 -
+        never), and then the record is dropped and counted in `n_dropped`.
+
+        Delivery is at-least-once: a batch interrupted by a broken connection is resent entirely after reconnecting
+    """
+
+    def __init__(self, address: Address, batch_size=64, max_buffered_records=10000,
+                 backpressure_timeout_sec: Optional[float] = None, reconnect_delay_max_sec=5.0) -> None:
+        """
+            :param address: (host, port) for TCP, or the path of a Unix socket
+        """
+        super().__init__()
+
+        self.address = address
+        self.batch_size = batch_size
+        self.backpressure_timeout_sec = backpressure_timeout_sec
+        self.reconnect_delay_max_sec = reconnect_delay_max_sec
+        self.time_overhead_io_sec = 0.0
+        self.n_dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_buffered_records)
+        self._socket = None  # type: Optional[socket.socket]
+        self._thread = threading.Thread(target=self._run, name='SocketDataHandler', daemon=True)
+        self._thread.start()
+
+    def handle(self, level, msg, data_obj, logger: logging.Logger) -> None:
+        converters_supported = self._getSupportedConverters(data_obj)
+        if len(converters_supported) == 0:
+            logger.log(level, msg + ' (No supported converters)')
+            return
+
+        buffers = []
+        for converter in converters_supported:
+            for extension, buffer in self._convertParts(converter, data_obj):
+                if buffer is not None:
+                    buffers.append((extension, buffer))
+
+        if len(buffers) == 0:
+            logger.log(level, "{} (Not saved)".format(msg))
+            return
+
+        frame = encode_frame({'name': logger.name, 'level': level, 'msg': msg, 'time': time.time()}, buffers)
+        try:
+            if self.backpressure_timeout_sec == 0:
+                self._queue.put_nowait(frame)
+            else:
+                self._queue.put(frame, timeout=self.backpressure_timeout_sec)
+        except queue.Full:
+            self.n_dropped += 1
+            logger.log(level, "{} (Dropped, collector at {} is unavailable)".format(msg, self.address))
+            return
+
+        logger.log(level, "{} (Sent to: {})".format(msg, self.address))
+
+    def flush(self) -> None:
+        """
+            Block until all the queued records were sent
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+            Send all the queued records and disconnect, blocks while the collector is unreachable
+        """
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            is_closing = batch[-1] is None
+            frames = [frame for frame in batch if frame is not None]
+            if len(frames) > 0:
+                self._send(b''.join(frames))
+
+            for _ in batch:
+                self._queue.task_done()
+
+            if is_closing:
+                if self._socket is not None:
+                    self._socket.close()
+                return
+
+    def _send(self, data: bytes):
+        reconnect_delay_sec = 0.05
+        while True:
+            time_start_sec = time.perf_counter()
+            try:
+                if self._socket is None:
+                    self._socket = _connect(self.address)
+
+                self._socket.sendall(data)
+                self.time_overhead_io_sec += time.perf_counter() - time_start_sec
+                return
+            except OSError:
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+
+            time.sleep(reconnect_delay_sec)
+            reconnect_delay_sec = min(reconnect_delay_sec * 2, self.reconnect_delay_max_sec)
+
+
+class _CollectorRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            frame = read_frame(self.rfile)
+            if frame is None:
+                return
+
+            # A failed record doesn't end the connection, which would lose the records sent after it
+            # noinspection PyBroadException
+            try:
+                # noinspection PyUnresolvedReferences
+                self.server.collector.handle_frame(*frame)
+            except Exception:
+                # noinspection PyUnresolvedReferences
+                self.server.collector.logger.exception('Unable to handle a received record')
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _ThreadingUnixStreamServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class DataCollector:
+    """
+        Receive the records streamed by `SocketDataHandler`s, and pass them to the given data handlers as `RawRecord`s
+        A `RawBufferConverter` is added to each handler that doesn't have one
+
+        Text messages are logged by `self.logger` children, named as the remote loggers
+    """
+
+    def __init__(self, address: Address, handlers: Iterable[DataHandlerBase]) -> None:
+        self.logger = DataLogger('DataCollector')
+        for handler in handlers:
+            if not any(isinstance(converter, RawBufferConverter) for converter in handler.converters):
+                handler.converters.insert(0, RawBufferConverter())
+
+            self.logger.addHandler(handler)
+
+        self._loggers_remote = {}  # type: Dict[str, DataLogger]
+        self._lock = threading.Lock()
+        self._thread = None  # type: Optional[threading.Thread]
+
+        if isinstance(address, str):
+            self.server = _ThreadingUnixStreamServer(address, _CollectorRequestHandler)
+        else:
+            self.server = _ThreadingTCPServer(address, _CollectorRequestHandler)
+
+        self.server.collector = self
+
+    @property
+    def address(self) -> Address:
+        return self.server.server_address
+
+    def handle_frame(self, meta: dict, buffers: List[Tuple[str, bytes]]):
+        with self._lock:
+            logger_remote = self._loggers_remote.get(meta['name'])
+            if logger_remote is None:
+                logger_remote = self._loggers_remote[meta['name']] = DataLogger(meta['name'])
+                logger_remote.parent = self.logger
+
+        record = RawRecord([
+            RawBuffer(buffer, _RE_EXTENSION_UNSAFE_CHARS.sub('_', str(extension))) for extension, buffer in buffers
+        ])
+
+        # Bypass the level checks of the loggers, the data handlers still filter by their own levels
+        # noinspection PyProtectedMember
+        logger_remote._handleData(meta['level'], meta['msg'], record, logger_remote)
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self) -> 'DataCollector':
+        """
+            Serve in a background thread
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name='DataCollector', daemon=True)
+        self._thread.start()
+
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+
+        self.server.server_close()
+        for handler in self.logger.handlers_data:
+            handler.close()
+
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.remove(self.address)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Collect data records streamed by SocketDataHandler into a directory')
+    group_address = parser.add_mutually_exclusive_group(required=True)
+    group_address.add_argument('--tcp', help='Address to listen on, as HOST:PORT')
+    group_address.add_argument('--unix', help='Path of a Unix socket to listen on')
+    parser.add_argument('--dir', required=True, help='Directory to save the received records to')
+    args = parser.parse_args(argv)
+
+    if args.tcp:
+        host, port = args.tcp.rsplit(':', 1)
+        address = (host, int(port))
+    else:
+        address = args.unix
+
+    collector = DataCollector(address, [SaveToDirHandler(args.dir)])
+    collector.logger.parent = logging.getLogger()
+    logging.getLogger().addHandler(LogHelper.generate_color_handler())
+    logging.getLogger().setLevel(logging.INFO)
+
+    logging.getLogger().info('Collecting data records from {} to "{}"'.format(address, args.dir))
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
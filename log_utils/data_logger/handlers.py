@@ -1,13 +1,17 @@
 import abc
+import glob
 import logging
 import os
 import re
+import threading
 import time
+import zlib
 from pathlib import Path
-from typing import Union, Optional, List
+from typing import Union, Optional, List, Dict, Sequence, Tuple
 
-from .converters import DataConverterBase
-from ..helper import LogHelper
+from .converters import DataConverterBase, ConversionCache, RawBuffer, RawBufferConverter, RawRecord
+from .durability import DURABILITY_FAST, DURABILITY_ATOMIC, DURABILITY_MODES, GroupCommitter, write_atomic
+from ..helper import LogHelper, ThreadLocalAccumulator
 
 
 class PrefixGeneratorBase:
@@ -35,16 +39,53 @@ class PrefixGeneratorCounting(PrefixGeneratorBase):
         super().__init__()
 
         self.digits = 3
-        self.counter = 0
+        self._counter = 0
+        self._lock = threading.Lock()  # Each value is generated once for all threads
 
     def reset(self, counter_value=0):
-        self.counter = counter_value
+        with self._lock:
+            self._counter = counter_value
+
+    @property
+    def counter(self) -> int:
+        """
+            The next value to be generated
+        """
+        return self._counter
+
+    @counter.setter
+    def counter(self, value: int):
+        self.reset(value)
+
+    def generate(self) -> str:
+        with self._lock:
+            value = self._counter
+            self._counter += 1
+
+        return str(value).zfill(self.digits) + ' '
+
+
+class PrefixGeneratorProcessUnique(PrefixGeneratorBase):
+    """
+        Collision free prefix for many processes (and threads) sharing a single output directory:
+        `<timestamp> <pid>-<sequence> `
+
+        The sequence is per process, advanced under a lock as by `PrefixGeneratorCounting`
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.digits = 6
+        self._sequence = 0
+        self._lock = threading.Lock()  # Each value is generated once for all threads
 
     def generate(self) -> str:
-        prefix = str(self.counter).zfill(self.digits) + ' '
-        self.counter += 1
+        with self._lock:
+            sequence = self._sequence
+            self._sequence += 1
 
-        return prefix
+        return '{} {}-{} '.format(LogHelper.timestamp(with_ms=True), os.getpid(), str(sequence).zfill(self.digits))
 
 
 class PathGeneratorBase:
@@ -58,6 +99,15 @@ class PathGeneratorBase:
     def generate(self, level: int, title: str, extension: str) -> Path:
         raise NotImplementedError()
 
+    def generate_for_logger(self, level: int, title: str, extension: str, logger_name: str) -> Optional[Path]:
+        """
+            Called by the handlers with the name of the record's logger - override to use it, by default it's ignored
+        """
+        return self.generate(level, title, extension)
+
+
+_RE_FILENAME_UNSAFE_CHARS = re.compile('[' + re.escape(':\\?<>|/%') + ']')
+
 
 class PathGeneratorDefault(PathGeneratorBase):
     def __init__(self, path_dir):
@@ -67,27 +117,136 @@ class PathGeneratorDefault(PathGeneratorBase):
         self.prefix_generator = PrefixGeneratorTimestamp()
         self.use_log_level = True
 
+        self._level_strings = {}  # type: Dict[int, str]
+
     @staticmethod
     def sanitize_filename(string: str) -> str:
-        def remove_chars_re(subj, chars):
-            return re.sub('[' + re.escape(''.join(chars)) + ']', '_', subj)
+        return _RE_FILENAME_UNSAFE_CHARS.sub('_', string)
+
+    def _level_string(self, level: int) -> str:
+        str_log_level = self._level_strings.get(level)
+        if str_log_level is None:
+            str_log_level = self._level_strings[level] = logging.getLevelName(level) + ' '
+
+        return str_log_level
 
-        return remove_chars_re(string, ':\\?<>|/%')
+    def generate_filename(self, level: int, title: str, extension: str) -> str:
+        str_log_level = self._level_string(level) if self.use_log_level else ''
+        filename = self.prefix_generator.generate() + str_log_level + title + extension
+
+        if self.sanitize_filenames:
+            filename = self.sanitize_filename(filename)
+
+        return filename
 
     def generate(self, level: int, title: str, extension: str) -> Optional[Path]:
         if not self.is_enabled():
             return None
 
-        str_log_level = ''
-        if self.use_log_level:
-            str_log_level = logging.getLevelName(level) + ' '
+        return Path(self.path_dir, self.generate_filename(level, title, extension))
 
-        filename = self.prefix_generator.generate() + str_log_level + title + extension
 
-        if self.sanitize_filenames:
-            filename = self.sanitize_filename(filename)
+class PathGeneratorSharded(PathGeneratorDefault):
+    """
+        Spread the files across a tree of sub-directories instead of a single flat directory, since file lookups
+        degrade in directories holding hundreds of thousands of entries
+
+        Each item of `shard_by` adds one directory level:
+        - 'date' - YYYYmmdd, 'hour' - HH: Taken from the timestamp prefix of the filename if present, otherwise now
+        - 'logger' - Name of the logger that logged the record
+        - 'hash' - First `hash_prefix_len` hex digits of the filename's CRC32
+
+        Created directories are remembered, so each is created once (re-create manually if deleted while in use)
+    """
 
-        return Path(self.path_dir, filename)
+    SHARD_DATE = 'date'
+    SHARD_HOUR = 'hour'
+    SHARD_LOGGER = 'logger'
+    SHARD_HASH = 'hash'
+
+    _RE_TIMESTAMP = re.compile(r'^(\d{8})_(\d{2})')
+    _RE_LEADING_DOTS = re.compile(r'^\.+')
+
+    def __init__(self, path_dir, shard_by: Sequence[str] = (SHARD_DATE, SHARD_HOUR), hash_prefix_len=2):
+        super().__init__(path_dir)
+
+        unknown_shards = set(shard_by) - {self.SHARD_DATE, self.SHARD_HOUR, self.SHARD_LOGGER, self.SHARD_HASH}
+        if unknown_shards:
+            raise ValueError('Unknown shards: {}'.format(', '.join(sorted(unknown_shards))))
+
+        self.shard_by = tuple(shard_by)
+        self.hash_prefix_len = hash_prefix_len
+
+        self._dirs_created = set()
+
+    @classmethod
+    def sanitize_directory_name(cls, string: str) -> str:
+        """
+            A single directory level - leading dots are escaped too, so it's never '.', '..' or hidden
+        """
+        string = cls.sanitize_filename(string)
+        string = cls._RE_LEADING_DOTS.sub(lambda match: '_' * len(match.group()), string)
+
+        return string or '_'
+
+    def _shards(self, filename: str, logger_name: Optional[str], wildcard: Optional[str] = None) -> List[str]:
+        """
+            :param wildcard: Returned for shards that can't be derived from the filename (for lookup), None to derive
+                them from the current time
+        """
+        if wildcard is not None:
+            # The hash is of the generated name, i.e. without the extension the handler appended to it
+            filename = os.path.splitext(filename)[0]
+
+        match_timestamp = self._RE_TIMESTAMP.match(filename)
+        if match_timestamp is None and wildcard is None:
+            match_timestamp = self._RE_TIMESTAMP.match(LogHelper.timestamp())
+
+        shards = []
+        for shard in self.shard_by:
+            if shard == self.SHARD_DATE:
+                shards.append(match_timestamp.group(1) if match_timestamp else wildcard)
+            elif shard == self.SHARD_HOUR:
+                shards.append(match_timestamp.group(2) if match_timestamp else wildcard)
+            elif shard == self.SHARD_LOGGER:
+                if logger_name is None:
+                    shards.append(wildcard or '_')
+                else:
+                    shards.append(self.sanitize_directory_name(logger_name))
+            else:
+                shards.append('{:08x}'.format(zlib.crc32(filename.encode()))[:self.hash_prefix_len])
+
+        return shards
+
+    def generate(self, level: int, title: str, extension: str) -> Optional[Path]:
+        return self.generate_for_logger(level, title, extension, None)
+
+    def generate_for_logger(self, level: int, title: str, extension: str, logger_name: Optional[str]) -> Optional[Path]:
+        if not self.is_enabled():
+            return None
+
+        filename = self.generate_filename(level, title, extension)
+        path_dir = os.path.join(str(self.path_dir), *self._shards(filename, logger_name))
+        if path_dir not in self._dirs_created:
+            os.makedirs(path_dir, exist_ok=True)
+            self._dirs_created.add(path_dir)
+
+        return Path(path_dir, filename)
+
+    def locate(self, filename: str, logger_name: Optional[str] = None) -> Optional[Path]:
+        """
+            Reverse lookup - Find the full path of a file generated by this instance, given its name
+            Shards that can't be derived from the name alone are searched for
+        """
+        shards = self._shards(filename, logger_name, wildcard='*')
+        if '*' not in shards:
+            path_file = Path(str(self.path_dir), *shards, filename)
+            return path_file if path_file.exists() else None
+
+        for path_file in Path(str(self.path_dir)).glob(os.path.join(*shards, glob.escape(filename))):
+            return path_file
+
+        return None
 
 
 # noinspection PyPep8Naming
@@ -96,6 +255,9 @@ class DataHandlerBase(metaclass=abc.ABCMeta):
         self.level = logging.NOTSET
         self.converters = []
 
+        # Handlers that accept lazy data receive callable data unevaluated (unless other handlers required evaluation)
+        self.accepts_lazy_data = False
+
         self.setLevel(level)
 
     def setLevel(self, level):
@@ -116,7 +278,36 @@ class DataHandlerBase(metaclass=abc.ABCMeta):
     def handle(self, level, msg, data, logger) -> None:
         raise NotImplementedError()
 
+    def flush(self) -> None:
+        """
+            Write out anything buffered by the handler, does nothing by default
+        """
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    @staticmethod
+    def _convert(converter: DataConverterBase, data):
+        """
+            Convert with the buffers shared by all the handlers of the record
+        """
+        return ConversionCache.convert(converter, data)
+
+    def _convertParts(self, converter: DataConverterBase, data) -> List[Tuple[str, Optional[bytes]]]:
+        """
+            :return: Pairs of (extension, buffer) - a single one, except for the buffers of a `RawRecord`
+        """
+        if isinstance(converter, RawBufferConverter):
+            return [(raw.extension, raw.buffer) for raw in converter.split(data)]
+
+        return [(converter.get_extension(data), self._convert(converter, data))]
+
     def _getSupportedConverters(self, data) -> List[DataConverterBase]:
+        # Already converted data is only passed through, other converters (e.g. pickle) would convert the wrapper
+        if isinstance(data, (RawBuffer, RawRecord)):
+            return [converter for converter in self.converters if isinstance(converter, RawBufferConverter)]
+
         converters_supported = []  # type:
         for converter in self.converters:
             if converter.is_supported(data):
@@ -126,51 +317,94 @@ class DataHandlerBase(metaclass=abc.ABCMeta):
 
 
 class SaveToDirHandler(DataHandlerBase):
-    def __init__(self, path_dir: Union[Path, str]) -> None:
+    """
+        Save every converted buffer as a file in a directory
+
+        :param durability: Trade throughput for safety on crash - 'fast' (write in place), 'atomic' (write a temporary
+            file and rename it) or 'durable' (atomic, and fsync-ed in groups of files within `group_commit_window_sec`)
+    """
+
+    def __init__(self, path_dir: Union[Path, str], durability=DURABILITY_FAST, group_commit_window_sec=0.0) -> None:
         super().__init__()
 
+        if durability not in DURABILITY_MODES:
+            raise ValueError('Unknown durability mode: {}'.format(durability))
+
         self.path_generator = PathGeneratorDefault(path_dir)  # type: PathGeneratorBase
-        self.time_overhead_io_sec = 0.0
+        self._time_overhead_io = ThreadLocalAccumulator(0.0)
         self.should_overwrite = True
+        self.durability = durability
+        self.group_committer = GroupCommitter(group_commit_window_sec)
 
         os.makedirs(str(self.path_generator.path_dir), exist_ok=True)
 
     def handle(self, level, msg, data_obj, logger: logging.Logger) -> None:
         # Use available converters to translate object to bytes, and pass them to handlers
         converters_supported = self._getSupportedConverters(data_obj)
-        path_file_without_extension = self.path_generator.generate(level, msg, '')
+        path_file_without_extension = self.path_generator.generate_for_logger(level, msg, '', logger.name)
         for converter in converters_supported:
             time_start_sec = time.perf_counter()
-            buffer = converter.to_buffer(data_obj)
-
-            # Save data if handler returned bytes
-            if buffer is not None and path_file_without_extension is not None:
-                path_file = path_file_without_extension.with_name(
-                    path_file_without_extension.name + converter.suggested_extension)
-
-                is_written_successfully = False
-                # noinspection PyBroadException
-                try:
-                    if not self.should_overwrite and path_file.exists():
-                        raise Exception('File already exist, overwrite disallowed')
-
-                    path_file.write_bytes(buffer)
-                    is_written_successfully = True
-                except Exception as e:
-                    logger.log(level, "{} (Unable to save; Exception: {})".format(msg, str(e)))
-                finally:
-                    time_io = time.perf_counter() - time_start_sec
-                    if is_written_successfully:
-                        logger.log(level, "{} (Saved to: \"{}\"); I/O: {:.3f} [sec]".format(msg, path_file, time_io))
+            for extension, buffer in self._convertParts(converter, data_obj):
+                self._save(level, msg, path_file_without_extension, extension, buffer, time_start_sec, logger)
+                time_start_sec = time.perf_counter()
 
-            else:
+        if len(converters_supported) == 0:
+            logger.log(level, msg + ' (No supported converters)')
+
+    def _save(self, level, msg, path_file_without_extension: Optional[Path], extension: str, buffer,
+              time_start_sec: float, logger: logging.Logger):
+        # Save data if handler returned bytes
+        if buffer is not None and path_file_without_extension is not None:
+            path_file = path_file_without_extension.with_name(path_file_without_extension.name + extension)
+
+            is_written_successfully = False
+            # noinspection PyBroadException
+            try:
+                self._write_file(path_file, buffer)
+                is_written_successfully = True
+            except Exception as e:
+                logger.log(level, "{} (Unable to save; Exception: {})".format(msg, str(e)))
+            finally:
                 time_io = time.perf_counter() - time_start_sec
-                logger.log(level, "{} (Not saved)".format(msg))
+                if is_written_successfully:
+                    logger.log(level, "{} (Saved to: \"{}\"); I/O: {:.3f} [sec]".format(msg, path_file, time_io))
 
-            self.time_overhead_io_sec += time_io
+        else:
+            time_io = time.perf_counter() - time_start_sec
+            logger.log(level, "{} (Not saved)".format(msg))
 
-        if len(converters_supported) == 0:
-            logger.log(level, msg + ' (No supported converters)')
+        self._time_overhead_io.add(time_io)
+
+    @property
+    def time_overhead_io_sec(self) -> float:
+        return self._time_overhead_io.value
+
+    @time_overhead_io_sec.setter
+    def time_overhead_io_sec(self, value: float):
+        self._time_overhead_io.value = value
+
+    def _write_file(self, path_file: Path, buffer) -> None:
+        if self.durability == DURABILITY_ATOMIC:
+            write_atomic(path_file, buffer, self.should_overwrite)
+            return
+
+        if self.durability != DURABILITY_FAST:
+            self.group_committer.write(path_file, buffer, self.should_overwrite)
+            return
+
+        if self.should_overwrite:
+            path_file.write_bytes(buffer)
+            return
+
+        # Exclusive creation (O_EXCL) - Fails atomically if the file exists, even if created by another process
+        try:
+            with open(str(path_file), 'xb') as file:
+                file.write(buffer)
+        except FileExistsError:
+            raise Exception('File already exist, overwrite disallowed')
+
+    def close(self) -> None:
+        self.group_committer.close()
 
 
 class SaveToDirHandlerFallthrough(SaveToDirHandler):
@@ -0,0 +1,282 @@
+"""
+    Read back the files written by `SaveToDirHandler` (with the default filenames), through an incremental index
+
+    reader = SaveToDirReader(path_dir_logs)
+    reader.update()  # Index only the files added since the last update
+    for record in reader.records(level_min=logging.WARNING, message='Matplotlib*'):
+        print(record.path, record.data)  # Data is loaded on first access
+"""
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Union, Optional, Dict, Iterable, Iterator, List
+
+from .converters import DataConverterBase, TextConverter, BinaryConverter, PickleConverter
+
+INDEX_FILENAME = '.log_utils_index.sqlite'
+
+# Directories modified this recently may still change within their mtime granularity, so they're rescanned next time
+_DIR_SETTLE_TIME_SEC = 2.0
+
+# Filenames of `PathGeneratorDefault`: "[<prefix> ][<level> ]<message><extension>" - the prefix of
+# `PrefixGeneratorTimestamp` ("<timestamp> "), `PrefixGeneratorProcessUnique` ("<timestamp> <pid>-<sequence> ") or
+# `PrefixGeneratorCounting` ("<counter> ")
+_RE_FILENAME = re.compile(
+    r'^(?:(?P<timestamp>\d{8}_\d{6}\.\d{3}) (?:(?P<pid>\d+)-(?P<sequence>\d+) )?|(?P<counter>\d+) )?(?P<rest>.*)$'
+)
+_RE_LEVEL = re.compile(r'^(?P<level>[A-Z]+|Level \d+) (?P<message>.*)$')
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        dir TEXT NOT NULL,
+        timestamp REAL,
+        pid INTEGER,
+        sequence INTEGER,
+        level INTEGER,
+        message TEXT NOT NULL,
+        extension TEXT NOT NULL,
+        size INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+    CREATE INDEX IF NOT EXISTS files_timestamp ON files (timestamp);
+    CREATE TABLE IF NOT EXISTS dirs (
+        path TEXT PRIMARY KEY,
+        parent TEXT,
+        mtime_ns INTEGER
+    );
+'''
+
+
+def parse_filename(filename: str) -> dict:
+    """
+        :return: timestamp (epoch seconds), pid, sequence (or counter), level, message and extension - None if missing
+    """
+    name, extension = os.path.splitext(filename)
+    match = _RE_FILENAME.match(name)
+
+    timestamp = None
+    if match.group('timestamp'):
+        timestamp = datetime.datetime.strptime(match.group('timestamp'), '%Y%m%d_%H%M%S.%f').timestamp()
+
+    sequence = match.group('sequence') or match.group('counter')
+
+    level = None
+    message = match.group('rest')
+    match_level = _RE_LEVEL.match(message)
+    if match_level:
+        level_value = logging.getLevelName(match_level.group('level'))
+        if isinstance(level_value, int):
+            level = level_value
+            message = match_level.group('message')
+
+    return dict(
+        timestamp=timestamp,
+        pid=int(match.group('pid')) if match.group('pid') else None,
+        sequence=int(sequence) if sequence is not None else None,
+        level=level,
+        message=message,
+        extension=extension,
+    )
+
+
+def default_converters() -> List[DataConverterBase]:
+    """
+        Converters for the extensions written by the converters of this package, the optional ones if importable
+    """
+    # noinspection PyUnresolvedReferences
+    from .converter_dataclass import DataclassConverter
+
+    converters = [TextConverter(), BinaryConverter(), PickleConverter(), DataclassConverter()]
+    pyplot_converter = PickleConverter()
+    pyplot_converter.suggested_extension = '.pyplot'
+    converters.append(pyplot_converter)
+
+    try:
+        from .converter_numpy import NumpyArrayConverter
+        converters.append(NumpyArrayConverter())
+    except ImportError:
+        pass
+
+    try:
+        from .converter_numpy_image import NumpyImageConverter
+        converters += [NumpyImageConverter(file_format) for file_format in ('png', 'jpg', 'jpeg', 'bmp', 'tiff')]
+    except ImportError:
+        pass
+
+    return converters
+
+
+class DataRecord:
+    """
+        A file indexed by `SaveToDirReader`, its data is read and deserialized on first access
+    """
+
+    __slots__ = ('path', 'timestamp', 'pid', 'sequence', 'level', 'message', 'extension', 'size', '_converter',
+                 '_data', '_is_loaded')
+
+    def __init__(self, path: Path, timestamp, pid, sequence, level, message, extension, size,
+                 converter: Optional[DataConverterBase]):
+        self.path = path
+        self.timestamp = timestamp  # type: Optional[float]
+        self.pid = pid  # type: Optional[int]
+        self.sequence = sequence  # type: Optional[int]
+        self.level = level  # type: Optional[int]
+        self.message = message  # type: str
+        self.extension = extension  # type: str
+        self.size = size  # type: int
+
+        self._converter = converter
+        self._data = None
+        self._is_loaded = False
+
+    @property
+    def datetime(self) -> Optional[datetime.datetime]:
+        return datetime.datetime.fromtimestamp(self.timestamp) if self.timestamp is not None else None
+
+    @property
+    def level_name(self) -> Optional[str]:
+        return logging.getLevelName(self.level) if self.level is not None else None
+
+    @property
+    def data(self):
+        if not self._is_loaded:
+            if self._converter is None:
+                raise Exception('No converter for extension: "{}"'.format(self.extension))
+
+            self._data = self._converter.from_buffer(self.path.read_bytes())
+            self._is_loaded = True
+
+        return self._data
+
+    def __repr__(self):
+        return '<DataRecord "{}">'.format(self.path.name)
+
+
+class SaveToDirReader:
+    """
+        Index of a `SaveToDirHandler` output directory (including sub-directories, e.g. of `PathGeneratorSharded`), kept
+        in an SQLite file. Updating it lists only the directories modified since the last update.
+
+        :param path_index: Location of the index, by default a hidden file in the directory
+        :param converters: Converters for deserializing, by their `suggested_extension` - see `default_converters()`
+    """
+
+    def __init__(self, path_dir: Union[Path, str], path_index: Union[Path, str, None] = None,
+                 converters: Optional[Iterable[DataConverterBase]] = None) -> None:
+        self.path_dir = Path(path_dir)
+        self.path_index = Path(path_index) if path_index is not None else self.path_dir / INDEX_FILENAME
+
+        self.converters = {}  # type: Dict[str, DataConverterBase]
+        for converter in (converters if converters is not None else default_converters()):
+            self.converters.setdefault(converter.suggested_extension, converter)
+
+        self._connection = sqlite3.connect(str(self.path_index))
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, value, tb):
+        self.close()
+
+    def update(self) -> int:
+        """
+            Index the files added since the last update
+            :return: Number of newly indexed files
+        """
+        time_settled_ns = int((time.time() - _DIR_SETTLE_TIME_SEC) * 1e9)
+        n_files_new = 0
+
+        with self._connection:
+            dirs_known = {
+                path: (parent, mtime_ns)
+                for path, parent, mtime_ns in self._connection.execute('SELECT path, parent, mtime_ns FROM dirs')
+            }
+            children = {}
+            for path, (parent, _) in dirs_known.items():
+                children.setdefault(parent, []).append(path)
+
+            dirs_pending = [('', None)]
+            while len(dirs_pending) > 0:
+                dir_relative, parent = dirs_pending.pop()
+                path_dir = os.path.join(str(self.path_dir), dir_relative)
+                try:
+                    mtime_ns = os.stat(path_dir).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+
+                if dir_relative in dirs_known and dirs_known[dir_relative][1] == mtime_ns:
+                    # Unchanged - only its sub-directories may have changed
+                    dirs_pending += [(child, dir_relative) for child in children.get(dir_relative, [])]
+                    continue
+
+                names_known = {
+                    path for path, in self._connection.execute('SELECT path FROM files WHERE dir = ?', (dir_relative,))
+                }
+                rows = []
+                with os.scandir(path_dir) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):  # Index and temporary files
+                            continue
+
+                        path_relative = os.path.join(dir_relative, entry.name)
+                        if entry.is_dir():
+                            dirs_pending.append((path_relative, dir_relative))
+                        elif path_relative not in names_known:
+                            fields = parse_filename(entry.name)
+                            rows.append((
+                                path_relative, dir_relative, fields['timestamp'], fields['pid'], fields['sequence'],
+                                fields['level'], fields['message'], fields['extension'], entry.stat().st_size
+                            ))
+
+                self._connection.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)',
+                    (dir_relative, parent, mtime_ns if mtime_ns < time_settled_ns else None)
+                )
+                n_files_new += len(rows)
+
+        return n_files_new
+
+    def records(self, time_start: Union[datetime.datetime, float, None] = None,
+                time_end: Union[datetime.datetime, float, None] = None,
+                level_min: Optional[int] = None, level_max: Optional[int] = None,
+                message: Optional[str] = None, extension: Optional[str] = None) -> Iterator[DataRecord]:
+        """
+            Indexed records, ordered by time (then by sequence) - call `update()` first to include new files
+
+            :param time_start: Inclusive, as a datetime or epoch seconds
+            :param time_end: Exclusive, as a datetime or epoch seconds
+            :param message: Glob pattern (case sensitive), e.g. 'Matplotlib*'
+            :param extension: e.g. '.png'
+        """
+        conditions = []
+        params = []
+        for condition, value in (('timestamp >= ?', time_start), ('timestamp < ?', time_end)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value.timestamp() if isinstance(value, datetime.datetime) else value)
+
+        for condition, value in (('level >= ?', level_min), ('level <= ?', level_max),
+                                 ('message GLOB ?', message), ('extension = ?', extension)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        query = 'SELECT path, timestamp, pid, sequence, level, message, extension, size FROM files'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY timestamp, pid, sequence, path'
+
+        for path, timestamp, pid, sequence, level, msg, ext, size in self._connection.execute(query, params):
+            yield DataRecord(
+                self.path_dir / path, timestamp, pid, sequence, level, msg, ext, size, self.converters.get(ext)
+            )
@@ -0,0 +1,186 @@
+import fnmatch
+import logging
+import re
+from typing import Optional, Iterable, List, Dict, Tuple, Union, Pattern
+
+from .handlers import DataHandlerBase
+
+_GLOB_CHARS = frozenset('*?[')
+
+
+class RoutingRule:
+    """
+        Match data records, and name the handlers they should be sent to
+
+        :param logger_name: Logger name prefix on dot boundaries ('app.db' matches 'app.db' and 'app.db.pool', but not
+            'app.dbx'), or a glob if it contains any of '*?[' (e.g. '*.db'). None matches all loggers.
+        :param level_min: Lowest matched level (inclusive)
+        :param level_max: Highest matched level (inclusive), None for no upper bound
+        :param msg_pattern: Regular expression searched for in the message
+        :param data_type: Type (or tuple of types) the data must be an instance of
+    """
+
+    def __init__(self, handlers: Iterable[DataHandlerBase], logger_name: Optional[str] = None,
+                 level_min=logging.NOTSET, level_max: Optional[int] = None,
+                 msg_pattern: Union[str, Pattern, None] = None, data_type: Union[type, Tuple[type, ...], None] = None):
+        self.handlers = list(handlers)
+        self.logger_name = logger_name
+        self.level_min = level_min
+        self.level_max = level_max
+        self.msg_pattern = re.compile(msg_pattern) if isinstance(msg_pattern, str) else msg_pattern
+        self.data_type = data_type
+
+    @property
+    def is_glob(self) -> bool:
+        return self.logger_name is not None and not _GLOB_CHARS.isdisjoint(self.logger_name)
+
+    def matches_level_and_type(self, level: int, data_type: type) -> bool:
+        if level < self.level_min or (self.level_max is not None and level > self.level_max):
+            return False
+
+        return self.data_type is None or issubclass(data_type, self.data_type)
+
+
+class _TrieNode:
+    __slots__ = ('children', 'rules')
+
+    def __init__(self):
+        self.children = {}  # type: Dict[str, _TrieNode]
+        self.rules = []  # type: List[Tuple[int, RoutingRule]]
+
+
+class RoutingTable:
+    """
+        Rules compiled for routing records by logger name in O(depth of the name): prefix rules are kept in a trie of
+        the name's components, glob rules are compiled to regular expressions. The rules matching each logger name, and
+        then each (name, level, data type), are cached - so only message patterns are evaluated per record.
+
+        A record is routed to the handlers of all the matching rules, in order of the rules, without duplicates
+    """
+
+    def __init__(self, rules: Iterable[RoutingRule] = (), max_cache_size=10000) -> None:
+        self.max_cache_size = max_cache_size
+
+        self._rules = []  # type: List[RoutingRule]
+        self._trie = _TrieNode()
+        self._globs = []  # type: List[Tuple[int, Pattern, RoutingRule]]
+        self._cache_names = {}  # type: Dict[str, List[Tuple[int, RoutingRule]]]
+        self._cache_routes = {}  # type: Dict[Tuple[str, int, type], Tuple[List[RoutingRule], List[DataHandlerBase]]]
+
+        for rule in rules:
+            self.add_rule(rule)
+
+    @property
+    def rules(self) -> List[RoutingRule]:
+        return list(self._rules)
+
+    @property
+    def handlers(self) -> List[DataHandlerBase]:
+        return self._unique_handlers(self._rules)
+
+    def add_rule(self, rule: RoutingRule) -> 'RoutingTable':
+        """
+            :return: Returns self instance to allow chaining pattern
+        """
+        index = len(self._rules)
+        self._rules.append(rule)
+
+        if rule.is_glob:
+            self._globs.append((index, re.compile(fnmatch.translate(rule.logger_name)), rule))
+        else:
+            node = self._trie
+            for component in (rule.logger_name.split('.') if rule.logger_name else ()):
+                node = node.children.setdefault(component, _TrieNode())
+            node.rules.append((index, rule))
+
+        self._cache_names.clear()
+        self._cache_routes.clear()
+
+        return self
+
+    @staticmethod
+    def _unique_handlers(rules: Iterable[RoutingRule]) -> List[DataHandlerBase]:
+        handlers = []
+        for rule in rules:
+            handlers += [handler for handler in rule.handlers if all(handler is not h for h in handlers)]
+
+        return handlers
+
+    def _match_name(self, logger_name: str) -> List[Tuple[int, RoutingRule]]:
+        rules = self._cache_names.get(logger_name)
+        if rules is not None:
+            return rules
+
+        node = self._trie
+        rules = list(node.rules)
+        for component in logger_name.split('.'):
+            node = node.children.get(component)
+            if node is None:
+                break
+            rules += node.rules
+
+        rules += [(index, rule) for index, regex, rule in self._globs if regex.match(logger_name)]
+        rules.sort(key=lambda index_rule: index_rule[0])
+
+        if len(self._cache_names) >= self.max_cache_size:
+            self._cache_names.clear()
+        self._cache_names[logger_name] = rules
+
+        return rules
+
+    def route(self, logger_name: str, level: int, msg: str, data) -> List[DataHandlerBase]:
+        key = (logger_name, level, type(data))
+        route = self._cache_routes.get(key)
+        if route is None:
+            rules = [
+                rule for _, rule in self._match_name(logger_name)
+                if rule.matches_level_and_type(level, type(data))
+            ]
+
+            # Handlers are resolved in advance, unless they depend on the message
+            handlers = None
+            if all(rule.msg_pattern is None for rule in rules):
+                handlers = self._unique_handlers(rules)
+
+            if len(self._cache_routes) >= self.max_cache_size:
+                self._cache_routes.clear()
+            route = self._cache_routes[key] = (rules, handlers)
+
+        rules, handlers = route
+        if handlers is not None:
+            return handlers
+
+        return self._unique_handlers(
+            rule for rule in rules if rule.msg_pattern is None or rule.msg_pattern.search(msg)
+        )
+
+
+class RoutingHandler(DataHandlerBase):
+    """
+        Send each record only to the handlers of the matching rules of its routing table, instead of to all handlers
+        Records without matching rules are sent to `default_handlers`
+    """
+
+    def __init__(self, table: RoutingTable, default_handlers: Iterable[DataHandlerBase] = ()) -> None:
+        super().__init__()
+
+        self.table = table
+        self.default_handlers = list(default_handlers)
+
+    def handle(self, level, msg, data, logger: logging.Logger) -> None:
+        handlers = self.table.route(logger.name, level, msg, data) or self.default_handlers
+        if len(handlers) == 0:
+            logger.log(level, '{} (No matching routes)'.format(msg))
+            return
+
+        for handler in handlers:
+            if level >= handler.level:
+                handler.handle(level, msg, data, logger)
+
+    def flush(self) -> None:
+        for handler in self.table.handlers + self.default_handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        for handler in self.table.handlers + self.default_handlers:
+            handler.close()
@@ -1,14 +1,28 @@
+import cProfile
 import datetime
+import functools
+import gzip
 import io
 import logging
 import logging.handlers
+import lzma
 import os
+import queue
+import re
+import shutil
 import sys
-from collections import deque
+import threading
+import time
+import weakref
+from collections import deque, Counter
 from time import perf_counter
+from typing import Optional, Dict, List, Tuple
 
 import colorlog
 
+# A single cProfile profiler can be active at a time - its hook is per thread until Python 3.12, and process-wide since
+_lock_cprofile = threading.Lock()
+
 
 class LogHelper:
     FORMATTER_COLOR = colorlog.ColoredFormatter('{log_color}{asctime} {name}: {levelname} {message}', style='{')
@@ -40,6 +54,25 @@ class LogHelper:
 
         return handler
 
+    @classmethod
+    def generate_compressing_rotating_file_handler(cls, path_log_file=None, when='midnight', files_count=7,
+                                                   max_bytes=0, compression='gzip'):
+        """
+            Same as `generate_simple_rotating_file_handler(...)`, with rotated files compressed in the background
+            See `CompressingRotatingFileHandler`
+        """
+        if path_log_file is None:
+            path_dir = os.path.dirname(sys.argv[0])
+            path_log_file = cls.suggest_script_log_name(path_dir)
+
+        handler = CompressingRotatingFileHandler(
+            path_log_file, when=when, backupCount=files_count, max_bytes=max_bytes, compression=compression
+        )
+        handler.setLevel(logging.DEBUG)
+        handler.setFormatter(cls.FORMATTER)
+
+        return handler
+
     @classmethod
     def suggest_script_log_name(cls, path_dir):
         return os.path.join(path_dir, cls.get_script_name() + '.log')
@@ -131,6 +164,412 @@ class PerformanceTimer(PerformanceMetric):
         return perf_counter() - self.time_last_start
 
 
+class CompressingRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+        Rotate by time (`when`) as well as by size (`max_bytes`), and compress the rotated files by a background thread
+        - so a rollover on the logging thread is only a rename
+
+        Rollovers within the same interval (by size) are numbered: `<file>.<time suffix>.1<ext>`, `.2`, ...
+        `backupCount` counts the kept backups, whether compressed yet or not
+
+        :param compression: 'gzip', 'lzma' or None
+    """
+
+    COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'lzma': '.xz', None: ''}
+
+    _RE_ROLLOVER_INDEX = re.compile(r'\.\d+$')
+
+    def __init__(self, filename, when='midnight', interval=1, backupCount=0, encoding=None, delay=False, utc=False,
+                 max_bytes=0, compression='gzip'):
+        if compression not in self.COMPRESSION_EXTENSIONS:
+            raise ValueError('Unsupported compression: {}'.format(compression))
+
+        super().__init__(
+            filename, when=when, interval=interval, backupCount=backupCount, encoding=encoding, delay=delay, utc=utc
+        )
+
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.compression_extension = self.COMPRESSION_EXTENSIONS[compression]
+
+        self._queue_compression = queue.Queue()
+        self._thread_compression = None  # type: Optional[threading.Thread]
+        # Replacing a backup by its compressed file, and deleting backups by retention, don't interleave
+        self._lock_backups = threading.Lock()
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+
+            msg = '%s\n' % self.format(record)
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(msg) >= self.max_bytes:
+                return True
+
+        return False
+
+    def _is_taken(self, path):
+        return os.path.exists(path) or os.path.exists(path + self.compression_extension)
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        time_now = int(time.time())
+        is_time_rollover = time_now >= self.rolloverAt
+
+        # Named for the start of the interval, as by `TimedRotatingFileHandler`
+        time_interval_start = self.rolloverAt - self.interval
+        time_tuple = time.gmtime(time_interval_start) if self.utc else time.localtime(time_interval_start)
+        path_rotated = self.baseFilename + '.' + time.strftime(self.suffix, time_tuple)
+        if self._is_taken(path_rotated):
+            index = 1
+            while self._is_taken('{}.{}'.format(path_rotated, index)):
+                index += 1
+            path_rotated = '{}.{}'.format(path_rotated, index)
+
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, path_rotated)
+
+            if self.compression is not None:
+                self._compress_in_background(path_rotated)
+
+        if self.backupCount > 0:
+            with self._lock_backups:
+                for path in self.getFilesToDelete():
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        if not self.delay:
+            self.stream = self._open()
+
+        if is_time_rollover:
+            rollover_at = self.computeRollover(time_now)
+            while rollover_at <= time_now:
+                rollover_at += self.interval
+            self.rolloverAt = rollover_at
+
+    def _is_backup(self, name: str, prefix: str) -> bool:
+        """
+            Whether a file name is of a backup rotated by this handler: `<file>.<time suffix>[.<index>][<ext>]` - other
+            files sharing the prefix (e.g. `script.log.lock`) aren't
+        """
+        if not name.startswith(prefix):
+            return False
+
+        suffix = name[len(prefix):]
+        if self.compression_extension and suffix.endswith(self.compression_extension):
+            suffix = suffix[:-len(self.compression_extension)]
+
+        suffix = self._RE_ROLLOVER_INDEX.sub('', suffix)
+        return self.extMatch.fullmatch(suffix) is not None
+
+    def getFilesToDelete(self):
+        """
+            Oldest backups beyond `backupCount` - including the ones pending compression
+        """
+        path_dir, base_name = os.path.split(self.baseFilename)
+        prefix = base_name + '.'
+        paths = [os.path.join(path_dir, name) for name in os.listdir(path_dir) if self._is_backup(name, prefix)]
+
+        # Compressed and uncompressed names of a single backup (during compression) are counted once
+        paths_uncompressed = {
+            path[:-len(self.compression_extension)]
+            if self.compression_extension and path.endswith(self.compression_extension) else path: path
+            for path in paths
+        }
+        if len(paths_uncompressed) <= self.backupCount:
+            return []
+
+        def mtime(path):
+            try:
+                return os.stat(path).st_mtime
+            except FileNotFoundError:
+                return 0
+
+        backups = sorted(paths_uncompressed, key=lambda path: mtime(paths_uncompressed[path]))
+        to_delete = []
+        for path in backups[:len(backups) - self.backupCount]:
+            to_delete += [path, path + self.compression_extension] if self.compression_extension else [path]
+
+        return to_delete
+
+    def _compress_in_background(self, path):
+        if self._thread_compression is None:
+            self._thread_compression = threading.Thread(
+                target=self._run_compression, name='LogCompression', daemon=True
+            )
+            self._thread_compression.start()
+
+        self._queue_compression.put(path)
+
+    def _run_compression(self):
+        open_compressed = gzip.open if self.compression == 'gzip' else lzma.open
+        while True:
+            path = self._queue_compression.get()
+            try:
+                if path is None:
+                    return
+
+                path_compressed = path + self.compression_extension
+                # noinspection PyBroadException
+                try:
+                    with open(path, 'rb') as file_src, open_compressed(path_compressed + '.tmp', 'wb') as file_dst:
+                        shutil.copyfileobj(file_src, file_dst)
+
+                    with self._lock_backups:
+                        stat = os.stat(path)
+                        os.utime(path_compressed + '.tmp', (stat.st_atime, stat.st_mtime))
+                        os.replace(path_compressed + '.tmp', path_compressed)
+                        os.remove(path)
+                except FileNotFoundError:  # Deleted by retention before compressed
+                    if os.path.exists(path_compressed + '.tmp'):
+                        os.remove(path_compressed + '.tmp')
+                except Exception:
+                    self.handleError(logging.makeLogRecord({'msg': 'Unable to compress: {}'.format(path)}))
+            finally:
+                self._queue_compression.task_done()
+
+    def flush_compression(self):
+        """
+            Block until all the rotated files were compressed
+        """
+        self._queue_compression.join()
+
+    def close(self):
+        super().close()
+
+        if self._thread_compression is not None:
+            self._queue_compression.put(None)
+            self._thread_compression.join()
+            self._thread_compression = None
+
+
+class ThreadLocalAccumulator:
+    """
+        A sum that many threads add to without contention - each thread adds to a cell of its own, and the cells are
+        summed on read. The cells of finished threads are merged into the base value, on read and whenever a thread
+        adds its first value - so the cells don't pile up while threads come and go.
+    """
+
+    def __init__(self, value=0.0):
+        self._base = value
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cells = []  # type: List[Tuple[weakref.ref, list]]
+
+    def add(self, value):
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = [0]
+            with self._lock:
+                self._merge_finished()
+                self._cells.append((weakref.ref(threading.current_thread()), cell))
+
+        # Only this thread writes to its cell
+        cell[0] += value
+
+    def _merge_finished(self):
+        cells_alive = []
+        for thread_ref, cell in self._cells:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                cells_alive.append((thread_ref, cell))
+            else:
+                self._base += cell[0]
+
+        self._cells = cells_alive
+
+    @property
+    def value(self):
+        with self._lock:
+            self._merge_finished()
+            return self._base + sum(cell[0] for _, cell in self._cells)
+
+    @value.setter
+    def value(self, value):
+        """
+            Reset the sum, concurrent additions may be lost
+        """
+        with self._lock:
+            self._base = value
+            for _, cell in self._cells:
+                cell[0] = 0
+
+
+class ProfileResult:
+    """
+        Profile of a single invocation, logged as data by `PerformanceProfiler`
+        - `stats`: cProfile statistics, as in `pstats.Stats(...).stats`
+        - `stacks`: Counts of sampled call stacks, as ';' separated frames from the outermost (collapsed stacks)
+    """
+
+    def __init__(self, name: str, duration_sec: float, stats: Optional[dict] = None,
+                 stacks: Optional[Dict[str, int]] = None):
+        self.name = name
+        self.duration_sec = duration_sec
+        self.stats = stats
+        self.stacks = stacks
+
+
+class _StackSampler:
+    """
+        Periodically records the call stack of a thread, from a background thread
+    """
+
+    def __init__(self, thread_id: int, interval_sec: float):
+        self.thread_id = thread_id
+        self.interval_sec = interval_sec
+        self.stacks = Counter()
+
+        self._event_stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._event_stop.wait(self.interval_sec):
+            # noinspection PyProtectedMember
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append('{}:{}'.format(os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+
+            if len(frames) > 0:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def stop(self) -> Dict[str, int]:
+        self._event_stop.set()
+        self._thread.join()
+
+        return dict(self.stacks)
+
+
+class PerformanceProfiler:
+    """
+        Profile only some invocations of a code block, and log each profile as data (a `ProfileResult`)
+        Save them with `PstatsConverter` / `CollapsedStackConverter` (see `log_utils.data_logger.converter_profile`)
+
+        Every `every_n`-th invocation is profiled, and so is the invocation following one slower than `threshold_sec`.
+        Other invocations cost a counter increment (and a timing, if a threshold is set).
+
+        profiler = PerformanceProfiler(data_logger, 'Inference', every_n=1000, threshold_sec=0.5)
+        with profiler:
+            ...
+
+        @profiler
+        def infer(...):
+            ...
+
+        :param logger: A `DataLogger`, nothing is profiled if it's disabled for `level`
+        :param mode: 'cprofile' - deterministic profile with `cProfile`, or 'sampler' - the stack of the invoking thread
+            is sampled every `sampling_interval_sec` (lower overhead, yields collapsed stacks for flame graphs)
+            Only one cProfile profile is taken at a time in the process - invocations due for profiling while another
+            one is (by any profiler, on any thread) are skipped
+    """
+
+    MODE_CPROFILE = 'cprofile'
+    MODE_SAMPLER = 'sampler'
+
+    def __init__(self, logger: logging.Logger, name='', every_n=100, threshold_sec: Optional[float] = None,
+                 level=logging.DEBUG, mode=MODE_CPROFILE, sampling_interval_sec=0.001):
+        if mode not in (self.MODE_CPROFILE, self.MODE_SAMPLER):
+            raise ValueError('Unknown profiling mode: {}'.format(mode))
+
+        self.logger = logger
+        self.name = name
+        self.every_n = every_n
+        self.threshold_sec = threshold_sec
+        self.level = level
+        self.mode = mode
+        self.sampling_interval_sec = sampling_interval_sec
+
+        self.n_invocations = 0
+        self.n_profiled = 0
+
+        self._is_armed = False
+        self._local = threading.local()
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self):
+        self.n_invocations += 1
+
+        profiler = None
+        if self._is_armed or (self.every_n > 0 and self.n_invocations % self.every_n == 0):
+            self._is_armed = False
+            if not getattr(self._local, 'is_profiling', False) and self.logger.isEnabledFor(self.level):
+                profiler = self._start()
+
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        stack.append((perf_counter() if profiler is not None or self.threshold_sec is not None else 0.0, profiler))
+        return self
+
+    def __exit__(self, t, value, tb):
+        time_start, profiler = self._local.stack.pop()
+        if profiler is None:
+            if self.threshold_sec is not None and perf_counter() - time_start > self.threshold_sec:
+                self._is_armed = True
+            return
+
+        duration_sec = perf_counter() - time_start
+        result = self._stop(profiler, duration_sec)
+        self.n_profiled += 1
+
+        self.logger.log(
+            self.level, 'Profile of {}: {:.3f} [sec]'.format(self.name or 'invocation', duration_sec), data=result
+        )
+
+    def _start(self):
+        """
+            :return: The started profiler, None if another cProfile profile is in progress
+        """
+        if self.mode == self.MODE_SAMPLER:
+            self._local.is_profiling = True
+            return _StackSampler(threading.get_ident(), self.sampling_interval_sec)
+
+        if not _lock_cprofile.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another tool (e.g. running under `python -m cProfile`) holds the profiling hook
+            _lock_cprofile.release()
+            return None
+
+        self._local.is_profiling = True
+        return profile
+
+    def _stop(self, profiler, duration_sec: float) -> ProfileResult:
+        self._local.is_profiling = False
+        if isinstance(profiler, _StackSampler):
+            return ProfileResult(self.name, duration_sec, stacks=profiler.stop())
+
+        try:
+            profiler.disable()
+        finally:
+            _lock_cprofile.release()
+
+        profiler.create_stats()
+        return ProfileResult(self.name, duration_sec, stats=profiler.stats)
+
+
 class PrintStream:
     """
         Shortcut for using `StringIO`
@@ -0,0 +1,245 @@
+import threading
+from time import perf_counter
+from typing import Dict, Optional, Iterable, List
+
+# This module is optional
+# noinspection PyPackageRequirements
+import numpy as np
+
+
+class MetricHandle:
+    """
+        Same interface as `PerformanceMetric`, but the samples are kept in a row of the registry's window
+
+        Each metric has a lock of its own, so threads submitting samples to different metrics don't contend
+    """
+
+    __slots__ = ('registry', 'index', 'name', 'units_str', 'units_format', 'row', '_position', '_count', '_last',
+                 '_lock')
+
+    def __init__(self, registry: 'MetricRegistry', index: int, name: str, units_suffix='', units_format='.2f'):
+        self.registry = registry
+        self.index = index
+        self.name = name
+        self.units_str = units_suffix
+        self.units_format = units_format
+
+        self.row = registry.row(index)
+        self._position = 0
+        self._count = 0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def submit_sample(self, sample: float):
+        with self._lock:
+            position = self._position
+            self.row[position] = sample
+            self._last = sample
+            self._position = position + 1 if position + 1 < len(self.row) else 0
+            if self._count < len(self.row):
+                self._count += 1
+
+    def reset(self):
+        with self._lock:
+            self.row[:] = 0
+            self._position = 0
+            self._count = 0
+            self._last = 0.0
+
+    @property
+    def n_samples(self) -> int:
+        return self._count
+
+    @property
+    def last(self) -> float:
+        return float(self._last)
+
+    @property
+    def average(self) -> Optional[float]:
+        n_samples = self.n_samples
+        if n_samples == 0:
+            return None
+
+        # Summed from the window itself, so it doesn't drift like a running total
+        return float(self.row.sum() / n_samples)
+
+    def format(self, average: Optional[float] = None) -> str:
+        if self.n_samples == 0:
+            return '[{}] No measurements'.format(self.name)
+
+        if average is None:
+            average = self.average
+
+        return '[{}] Average: {:{}} {}; Last: {:{}} {}; Samples: {};'.format(
+            self.name, average, self.units_format, self.units_str,
+            self.last, self.units_format, self.units_str,
+            self.n_samples
+        )
+
+    def __str__(self):
+        return self.format()
+
+    def last_str(self):
+        return '[{}] {:{}} {}'.format(self.name, self.last, self.units_format, self.units_str)
+
+
+class TimerHandle(MetricHandle):
+    """
+        Same interface as `PerformanceTimer`
+    """
+
+    __slots__ = ('time_last_start',)
+
+    def __init__(self, registry: 'MetricRegistry', index: int, name: str, units_format='.1f'):
+        super().__init__(registry, index, name, units_suffix='sec', units_format=units_format)
+        self.time_last_start = 0.0
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, t, value, tb):
+        self.end()
+
+    def begin(self):
+        self.time_last_start = perf_counter()
+
+    def end(self):
+        self.submit_sample(self.peek())
+
+    def peek(self):
+        return perf_counter() - self.time_last_start
+
+
+class MetricRegistry:
+    """
+        Many metrics in preallocated ring buffers (a row of `n_samples` per metric), instead of a `deque` of boxed
+        floats per `PerformanceMetric` - Allows aggregating, reporting and resetting all the metrics at once
+
+        The rows are allocated in blocks that never move, so growing the registry doesn't block submitting samples
+
+        registry = MetricRegistry()
+        with registry.timer('Inference'):
+            ...
+        registry.metric('Batch size', units_suffix='images').submit_sample(32)
+
+        print(registry.report())
+    """
+
+    def __init__(self, n_samples=1000, capacity=64) -> None:
+        """
+            :param capacity: Initial number of metrics, grows as needed
+        """
+        self.n_samples = n_samples
+        self.capacity = capacity
+
+        self._blocks = [np.zeros((capacity, n_samples), dtype=np.float64)]  # type: List[np.ndarray]
+        self._handles = {}  # type: Dict[str, MetricHandle]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __getitem__(self, name: str) -> MetricHandle:
+        return self._handles[name]
+
+    def metric(self, name: str, units_suffix='', units_format='.2f') -> MetricHandle:
+        """
+            :return: The metric of the given name, created if it doesn't exist
+        """
+        return self._get_or_create(
+            name, MetricHandle, lambda index: MetricHandle(self, index, name, units_suffix, units_format)
+        )
+
+    def timer(self, name: str, units_format='.1f') -> TimerHandle:
+        """
+            :return: The timer of the given name, created if it doesn't exist - raises if it exists as a plain metric
+        """
+        return self._get_or_create(name, TimerHandle, lambda index: TimerHandle(self, index, name, units_format))
+
+    def _get_or_create(self, name, handle_type, create_handle):
+        handle = self._handles.get(name)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(name)
+                if handle is None:
+                    index = len(self._handles)
+                    if index == self.capacity:
+                        self._grow()
+
+                    handle = self._handles[name] = create_handle(index)
+
+        if not isinstance(handle, handle_type):
+            raise TypeError('Metric "{}" already exists as a {}, not a {}'.format(
+                name, type(handle).__name__, handle_type.__name__
+            ))
+
+        return handle
+
+    def _grow(self):
+        # Doubles the capacity - by a new block, the rows of the existing metrics stay in place
+        self._blocks.append(np.zeros((self.capacity, self.n_samples), dtype=np.float64))
+        self.capacity *= 2
+
+    def row(self, index: int) -> np.ndarray:
+        """
+            :return: The window of the metric of the given index, a view on its block
+        """
+        for block in self._blocks:
+            if index < len(block):
+                return block[index]
+            index -= len(block)
+
+        raise IndexError('Metric index out of range')
+
+    @property
+    def samples(self) -> np.ndarray:
+        """
+            :return: The windows of all the metrics (by order of creation), as a copy
+        """
+        return np.concatenate(self._blocks)[:len(self._handles)]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.array([handle.n_samples for handle in list(self._handles.values())], dtype=np.int64)
+
+    def averages(self) -> np.ndarray:
+        """
+            :return: Averages of all the metrics (by order of creation), NaN for metrics without samples
+        """
+        counts = self.counts
+        n_metrics = len(counts)
+        sums = np.concatenate([block.sum(axis=1) for block in list(self._blocks)])[:n_metrics]
+
+        averages = np.full(n_metrics, np.nan)
+        np.divide(sums, counts, out=averages, where=counts > 0)
+
+        return averages
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+            :return: For each metric name - its average, last sample, and number of samples
+        """
+        items = list(self._handles.items())  # Metrics created meanwhile aren't included
+        averages = self.averages()
+        return {
+            name: dict(
+                average=float(averages[handle.index]) if handle.n_samples > 0 else None,
+                last=handle.last,
+                n_samples=handle.n_samples
+            )
+            for name, handle in items
+        }
+
+    def reset(self, names: Optional[Iterable[str]] = None):
+        """
+            :param names: Metrics to reset, None for all
+        """
+        handles = list(self._handles.values()) if names is None else [self._handles[name] for name in names]
+        for handle in handles:
+            handle.reset()
+
+    def report(self) -> str:
+        handles = list(self._handles.values())
+        averages = self.averages()
+        return '\n'.join(handle.format(averages[handle.index]) for handle in handles)
@@ -1,10 +1,15 @@
+import json
 import logging
 import logging.handlers
+import multiprocessing
+import pickle
 import shutil
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
 from tempfile import mkdtemp
-from unittest import TestCase
+from unittest import TestCase, mock
 
 # noinspection PyPackageRequirements
 import numpy as np
@@ -12,11 +17,19 @@ import numpy as np
 from matplotlib import pyplot
 
 from log_utils.data_logger import DataLogger
-from log_utils.data_logger.converter_dataclass import DataclassConverter
+from log_utils.data_logger.converter_dataclass import DataclassConverter, dataclass_to_dict
 from log_utils.data_logger.converter_matplotlib import MatplotlibConverter
+from log_utils.data_logger.converter_numpy import NumpyArrayConverter
 from log_utils.data_logger.converter_numpy_image import NumpyImageConverter
 from log_utils.data_logger.converters import TextConverter, BinaryConverter, PickleConverter
-from log_utils.data_logger.handlers import PrefixGeneratorCounting, SaveToDirHandler
+from log_utils.data_logger.durability import DURABILITY_DURABLE, DURABILITY_MODES, GroupCommitter
+from log_utils.data_logger.handler_columnar import ColumnarDataHandler, load_columnar
+from log_utils.data_logger.handler_flight_recorder import FlightRecorderHandler
+from log_utils.data_logger.handler_json_lines import JsonLinesHandler
+from log_utils.data_logger.handlers import DataHandlerBase, PrefixGeneratorCounting, SaveToDirHandler, \
+    PathGeneratorDefault, PathGeneratorSharded, PrefixGeneratorProcessUnique
+from log_utils.data_logger.reader import SaveToDirReader
+from log_utils.data_logger.routing import RoutingTable, RoutingRule, RoutingHandler
 from log_utils.helper import LogHelper
 
 logger_root = logging.getLogger()
@@ -179,6 +192,553 @@ class TestDataLogger(TestCase):
         finally:
             shutil.rmtree(str(path_dir_logs))
 
+    def test_dataclass_json_lines(self):
+        """
+            High rate dataclasses are appended as compact JSON lines to a single rolling file
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            handler = JsonLinesHandler(path_dir_logs / 'records.jsonl', max_bytes=1024, files_count=2)
+            handler.addConverter(DataclassConverter(compact=True))
+
+            logger = DataLogger('TestScript', logging.DEBUG)
+            logger.addHandler(handler)
+
+            my_data = SomeNestedDataObject(name='step', layers=[SomeDataObject(12, 'unet'), SomeDataObject(3, 'fpn')])
+            self.assertEqual(dataclass_to_dict(my_data), asdict(my_data))
+
+            # Compact buffers of the default serializer aren't parsed back for validation
+            with mock.patch('log_utils.data_logger.handler_json_lines.json.loads') as mock_loads:
+                for _ in range(20):
+                    logger.debug('Dataclass object', data=my_data)
+            mock_loads.assert_not_called()
+            handler.close()
+
+            paths = sorted(path_dir_logs.glob('records.jsonl*'))
+            self.assertEqual(len(paths), 3)  # Current file and two rolled over files
+
+            records = [json.loads(line) for line in (path_dir_logs / 'records.jsonl.1').read_text().splitlines()]
+            self.assertTrue(len(records) > 0)
+            self.assertEqual(records[0]['msg'], 'Dataclass object')
+            self.assertEqual(records[0]['level'], 'DEBUG')
+            self.assertEqual(records[0]['data'], asdict(my_data))
+
+            # Multi-line JSON is re-encoded, text is embedded as a string, other buffers are skipped
+            handler = JsonLinesHandler(path_dir_logs / 'other.jsonl')
+            handler.addConverter(DataclassConverter()).addConverter(TextConverter()).addConverter(BinaryConverter())
+            logger = DataLogger('OtherScript', logging.DEBUG)
+            logger.addHandler(handler)
+
+            logger.debug('Dataclass object', data=my_data)
+            logger.debug('Some string data', data='hello\n"world"')
+            logger.debug('Some binary data', data=b'\x89PNG')
+            handler.close()
+
+            lines = (path_dir_logs / 'other.jsonl').read_text().splitlines()
+            self.assertEqual([json.loads(line)['data'] for line in lines], [asdict(my_data), 'hello\n"world"'])
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_columnar_metrics(self):
+        """
+            Numeric samples are accumulated in memory, and written in bulk chunks that load back as whole series
+        """
+        for file_format in ('npz', 'csv'):
+            path_dir_logs = Path(mkdtemp())
+            try:
+                handler = ColumnarDataHandler(path_dir_logs, file_format=file_format, max_buffered_samples=40)
+
+                logger = DataLogger('TestScript', logging.DEBUG)
+                logger.addHandler(handler)
+
+                for i in range(100):
+                    logger.debug('Loss', data=i * 0.5)
+                    logger.debug('Stats', data={'mean': float(i), 'std': 1.0} if i < 50 else {'mean': float(i)})
+                logger.debug('Not numeric', data='text')
+
+                # Invalid column names are skipped, names of `np.savez` arguments are like any other name
+                for data in ({'time': 5.0}, {'mean': 1.0, 1: 2.0}, {'a,b': 1.0}, {'a\nb': 1.0}):
+                    logger.debug('Stats', data=data)
+                logger.debug('Odd names', data={'file': 1.0, 'allow_pickle': 2.0, '__msg__x': 3.0})
+                handler.close()
+
+                self.assertEqual(len(list(path_dir_logs.iterdir())), 11)  # 5 flushes of 2 series, 1 on close
+
+                series = load_columnar(path_dir_logs)
+                loss = series[('TestScript', 'Loss')]
+                self.assertTrue(np.array_equal(loss['value'], np.arange(100) * 0.5))
+                self.assertTrue(np.all(np.diff(loss['time']) >= 0))
+
+                stats = series[('TestScript', 'Stats')]
+                self.assertTrue(np.array_equal(stats['mean'], np.arange(100)))
+                self.assertTrue(np.all(stats['std'][:50] == 1.0))
+                self.assertTrue(np.all(np.isnan(stats['std'][50:])))
+
+                odd_names = series[('TestScript', 'Odd names')]
+                self.assertEqual(sorted(odd_names), ['__msg__x', 'allow_pickle', 'file', 'time'])
+                self.assertTrue(np.array_equal(odd_names['allow_pickle'], [2.0]))
+
+                # A failed flush doesn't raise into the logging call, and its buffers aren't written again
+                path_dir_failing = path_dir_logs / 'failing'
+                handler = ColumnarDataHandler(path_dir_failing, file_format=file_format, max_buffered_samples=2)
+                logger = DataLogger('TestScript', logging.DEBUG)
+                logger.addHandler(handler)
+                with mock.patch.object(handler, '_write_chunk', side_effect=OSError('Disk full')):
+                    logger.debug('Loss', data=1.0)
+                    logger.debug('Loss', data=2.0)
+                logger.debug('Loss', data=3.0)
+                handler.close()
+                loss = load_columnar(path_dir_failing)[('TestScript', 'Loss')]
+                self.assertTrue(np.array_equal(loss['value'], [3.0]))
+
+            finally:
+                shutil.rmtree(str(path_dir_logs))
+
+    def test_sharded_directories(self):
+        """
+            Files are spread across sub-directories, and can be found back by their filenames
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            data_handler = SaveToDirHandler(path_dir_logs).addConverter(TextConverter())
+            data_handler.path_generator = PathGeneratorSharded(path_dir_logs, shard_by=('date', 'logger', 'hash'))
+
+            logger = DataLogger('TestScript', logging.DEBUG)
+            logger.addHandler(data_handler)
+
+            for i in range(10):
+                logger.debug('Some text {}'.format(i), data='Text {}'.format(i))
+
+            paths = list(path_dir_logs.glob('*/TestScript/*/*.txt'))
+            self.assertEqual(len(paths), 10)
+
+            for path_file in paths:
+                self.assertEqual(data_handler.path_generator.locate(path_file.name, 'TestScript'), path_file)
+                self.assertEqual(data_handler.path_generator.locate(path_file.name), path_file)
+
+            self.assertIsNone(data_handler.path_generator.locate('20000101_000000.000 DEBUG Missing.txt'))
+
+            # Logger names can't escape the directory
+            path_generator = PathGeneratorSharded(path_dir_logs / 'sharded', shard_by=('logger',))
+            for logger_name in ('..', '.', '.hidden', '../..'):
+                path_file = path_generator.generate_for_logger(logging.DEBUG, 'Some text', '.txt', logger_name)
+                self.assertEqual(path_file.parent.parent, path_dir_logs / 'sharded')
+                self.assertFalse(path_file.parent.name.startswith('.'))
+
+            # Path generators of the original interface (without the logger name) are still supported
+            class PathGeneratorFixed(PathGeneratorDefault):
+                def generate(self, level, title, extension):
+                    return Path(self.path_dir, title + extension)
+
+            data_handler.path_generator = PathGeneratorFixed(path_dir_logs)
+            logger.debug('Fixed', data='Text')
+            self.assertEqual((path_dir_logs / 'Fixed.txt').read_text(), 'Text')
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_multi_process_unique_names(self):
+        """
+            Several processes, each with several threads, write to a single directory without overwriting each other
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            n_processes, n_threads, n_records = 3, 4, 50
+            processes = [
+                multiprocessing.get_context('fork').Process(
+                    target=write_unique_records, args=(path_dir_logs, n_threads, n_records)
+                )
+                for _ in range(n_processes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+            self.assertEqual(len(list(path_dir_logs.glob('*.txt'))), n_processes * n_threads * n_records)
+
+            # Overwrite is detected by exclusive creation
+            data_handler = SaveToDirHandler(path_dir_logs).addConverter(TextConverter())
+            data_handler.should_overwrite = False
+            with self.assertRaises(Exception):
+                data_handler._write_file(next(path_dir_logs.glob('*.txt')), b'Overwritten')
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_durability_fork(self):
+        """
+            A process forked after the parent wrote durably commits its own files
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            data_handler = SaveToDirHandler(path_dir_logs, durability=DURABILITY_DURABLE).addConverter(TextConverter())
+            data_handler.path_generator.prefix_generator = PrefixGeneratorProcessUnique()
+
+            logger = DataLogger('TestScript', logging.DEBUG)
+            logger.addHandler(data_handler)
+            logger.debug('Parent record', data='Text')
+
+            process = multiprocessing.get_context('fork').Process(
+                target=logger.debug, args=('Child record',), kwargs={'data': 'Text'}
+            )
+            process.start()
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+            self.assertEqual(process.exitcode, 0)
+            data_handler.close()
+
+            names = [path.name for path in path_dir_logs.iterdir()]
+            self.assertEqual(len(names), 2)
+            self.assertTrue(any(name.endswith('Child record.txt') for name in names))
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_durability_modes(self):
+        """
+            Throughput of each durability mode - written by 4 threads, run with `-s` to see the numbers
+        """
+        n_threads, n_records = 4, 50
+        for durability in DURABILITY_MODES:
+            path_dir_logs = Path(mkdtemp())
+            try:
+                data_handler = SaveToDirHandler(path_dir_logs, durability=durability).addConverter(BinaryConverter())
+                data_handler.path_generator.prefix_generator = PrefixGeneratorProcessUnique()
+
+                logger = DataLogger('TestScript', logging.DEBUG)
+                logger.addHandler(data_handler)
+
+                def write_records():
+                    for _ in range(n_records):
+                        logger.debug('Record', data=bytes(4096))
+
+                threads = [threading.Thread(target=write_records) for _ in range(n_threads)]
+                time_start_sec = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                time_total_sec = time.perf_counter() - time_start_sec
+                data_handler.close()
+
+                logger_root.info('Durability "{}": {:.0f} [records/sec], {} group commits'.format(
+                    durability, n_threads * n_records / time_total_sec, data_handler.group_committer.n_commits
+                ))
+
+                paths = list(path_dir_logs.iterdir())
+                self.assertEqual(len(paths), n_threads * n_records)
+                self.assertTrue(all(path.stat().st_size == 4096 for path in paths))
+
+            finally:
+                shutil.rmtree(str(path_dir_logs))
+
+    def test_durability_failure(self):
+        """
+            A file that failed to commit leaves no temporary file behind
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            group_committer = GroupCommitter()
+            with mock.patch('log_utils.data_logger.durability.fsync_path', side_effect=OSError('Disk failure')):
+                with self.assertRaises(OSError):
+                    group_committer.write(path_dir_logs / 'record.bin', bytes(16))
+            group_committer.close()
+
+            self.assertEqual(list(path_dir_logs.iterdir()), [])
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_flight_recorder(self):
+        """
+            Recent records are kept in memory (unevaluated), and saved only once an error occurs
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            data_handler = SaveToDirHandler(path_dir_logs).addConverter(TextConverter())
+            data_handler.path_generator.prefix_generator = PrefixGeneratorCounting()
+            recorder = FlightRecorderHandler(data_handler, capacity=5)
+
+            logger = DataLogger('TestScript', logging.DEBUG)
+            logger.addHandler(recorder)
+            logger.addHandler(recorder.create_trigger_handler())
+
+            evaluated = []
+            for i in range(20):
+                logger.debug('Record {}'.format(i), data=lambda i=i: evaluated.append(i) or 'Text {}'.format(i))
+
+            self.assertEqual(evaluated, [])
+            self.assertEqual(len(list(path_dir_logs.iterdir())), 0)
+
+            logger.error('Failure', data='Error details')
+            self.assertEqual(evaluated, [16, 17, 18, 19])
+            self.assertEqual(
+                [path.name for path in sorted(path_dir_logs.iterdir())],
+                ['000 DEBUG Record 16.txt', '001 DEBUG Record 17.txt', '002 DEBUG Record 18.txt',
+                 '003 DEBUG Record 19.txt', '004 ERROR Failure.txt']
+            )
+
+            # Text records trigger as well
+            logger.debug('Record 20', data='Text 20')
+            logger.error('Failure without data')
+            self.assertEqual(len(list(path_dir_logs.iterdir())), 6)
+
+            # Converted on arrival, bounded by size - the target's converters don't convert the stored buffers again
+            data_handler.addConverter(PickleConverter())
+            recorder = FlightRecorderHandler(data_handler, max_bytes=20, store_buffers=True)
+            recorder.addConverter(TextConverter())
+            logger.handlers_data = (recorder,)
+            for i in range(10):
+                logger.debug('Buffered record {}'.format(i), data='Text {}'.format(i))
+            recorder.dump()
+            self.assertEqual(len(list(path_dir_logs.glob('*Buffered record*'))), 3)
+
+            # The buffers of a record are saved together, and the target's level applies
+            recorder.addConverter(PickleConverter())
+            recorder.max_bytes = None
+            data_handler.setLevel(logging.INFO)
+            logger.debug('Debug record', data='Text')
+            logger.info('Info record', data='Text')
+            recorder.dump()
+            self.assertEqual(list(path_dir_logs.glob('*Debug record*')), [])
+            self.assertEqual(sorted(path.name for path in path_dir_logs.glob('*Info record*')),
+                             ['009 INFO Info record.pickle', '009 INFO Info record.txt'])
+            self.assertEqual(pickle.loads(next(path_dir_logs.glob('*Info record.pickle')).read_bytes()), 'Text')
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_routing(self):
+        """
+            Records are sent only to the handlers of the matching rules
+        """
+        handler_db, handler_images, handler_errors, handler_default = (ListHandler() for _ in range(4))
+        table = RoutingTable([
+            RoutingRule([handler_db], logger_name='app.db'),
+            RoutingRule([handler_images], logger_name='app.*', data_type=np.ndarray),
+            RoutingRule([handler_errors], level_min=logging.ERROR),
+            RoutingRule([handler_errors], msg_pattern='^Slow'),
+        ])
+
+        logger_app = DataLogger('app', logging.DEBUG)
+        logger_app.addHandler(RoutingHandler(table, default_handlers=[handler_default]))
+        logger_db = DataLogger('app.db.pool')
+        logger_db.parent = logger_app
+        logger_dbx = DataLogger('app.dbx')
+        logger_dbx.parent = logger_app
+
+        logger_db.debug('Query', data='SELECT 1')
+        logger_db.debug('Slow query', data='SELECT 2')
+        logger_dbx.debug('Image', data=np.zeros(2))
+        logger_dbx.error('Failed image', data=np.zeros(3))
+        logger_app.debug('Other', data=1)
+
+        self.assertEqual(handler_db.msgs, ['Query', 'Slow query'])
+        self.assertEqual(handler_images.msgs, ['Image', 'Failed image'])
+        self.assertEqual(handler_errors.msgs, ['Slow query', 'Failed image'])
+        self.assertEqual(handler_default.msgs, ['Other'])
+
+    def test_shared_conversion(self):
+        """
+            The data of a record is converted once per distinct converter, for all the handlers in the hierarchy
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            logger_parent = DataLogger('Parent', logging.DEBUG)
+            logger_parent.addHandler(SaveToDirHandler(path_dir_logs / 'parent').addConverter(MatplotlibConverter()))
+            logger_child = DataLogger('Child', logging.DEBUG)
+            logger_child.addHandler(SaveToDirHandler(path_dir_logs / 'child').addConverter(MatplotlibConverter()))
+            logger_child.parent = logger_parent
+
+            # Both converters close the figure, the second one reuses the buffer of the first one
+            logger_child.debug('Matplotlib Figure', data=DemoComponent.figure_visualization)
+
+            paths = [next((path_dir_logs / name).glob('*.png')) for name in ('parent', 'child')]
+            self.assertEqual(paths[0].read_bytes(), paths[1].read_bytes())
+
+            converter_parent, converter_child = CountingTextConverter(), CountingTextConverter()
+            converter_other = CountingTextConverter(encoding='utf16')
+            logger_parent.handlers_data[0].addConverter(converter_parent)
+            logger_child.handlers_data[0].addConverter(converter_child).addConverter(converter_other)
+
+            logger_child.debug('Some string data', data='Text')
+            self.assertEqual(converter_parent.n_conversions + converter_child.n_conversions, 1)
+            self.assertEqual(converter_other.n_conversions, 1)
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_shared_conversion_should_close(self):
+        """
+            Figures are closed if any converter of the hierarchy should close them, even if another one leaves it open
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            for should_close_parent, should_close_child in ((True, False), (False, True)):
+                pyplot.close('all')
+
+                logger_parent = DataLogger('Parent', logging.DEBUG)
+                logger_parent.addHandler(
+                    SaveToDirHandler(path_dir_logs).addConverter(MatplotlibConverter(should_close=should_close_parent))
+                )
+                logger_child = DataLogger('Child', logging.DEBUG)
+                logger_child.addHandler(
+                    SaveToDirHandler(path_dir_logs).addConverter(MatplotlibConverter(should_close=should_close_child))
+                )
+                logger_child.parent = logger_parent
+
+                for i in range(3):
+                    figure = pyplot.figure()
+                    pyplot.plot([0, i])
+                    logger_child.debug('Matplotlib Figure', data=figure)
+
+                self.assertEqual(pyplot.get_fignums(), [])
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_thread_concurrency(self):
+        """
+            Many threads log data concurrently, nothing is lost - Run with `-s` to see the throughput per thread count
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            n_records = 200
+            for n_threads in (1, 2, 4, 8):
+                data_handler = SaveToDirHandler(path_dir_logs / str(n_threads)).addConverter(TextConverter())
+                data_handler.path_generator.prefix_generator = PrefixGeneratorCounting()
+                data_handler.should_overwrite = False
+                handler_memory = ListHandler()
+
+                logger = DataLogger('TestScript', logging.DEBUG)
+                logger.addHandler(data_handler)
+
+                def write_records():
+                    logger.addHandler(handler_memory)  # Handlers are added while others log
+                    for i in range(n_records):
+                        logger.debug('Record', data=lambda: 'Text {}'.format(i))
+
+                threads = [threading.Thread(target=write_records) for _ in range(n_threads)]
+                time_start_sec = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                time_total_sec = time.perf_counter() - time_start_sec
+
+                logger_root.info('{} threads: {:.0f} [records/sec]'.format(
+                    n_threads, n_threads * n_records / time_total_sec
+                ))
+
+                n_total = n_threads * n_records
+                self.assertEqual(len(list((path_dir_logs / str(n_threads)).iterdir())), n_total)
+                self.assertEqual(data_handler.path_generator.prefix_generator.counter, n_total)
+                self.assertEqual(len(logger.handlers_data), 1 + n_threads)
+                self.assertTrue(logger.time_overhead_generation_sec > 0)
+                self.assertTrue(data_handler.time_overhead_io_sec > 0)
+
+                data_handler.time_overhead_io_sec = 0
+                self.assertEqual(data_handler.time_overhead_io_sec, 0)
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_reader(self):
+        path_dir_logs = Path(mkdtemp())
+        try:
+            path_generator = PathGeneratorSharded(path_dir_logs, shard_by=('date', 'logger'))
+            path_generator.prefix_generator = PrefixGeneratorProcessUnique()
+
+            data_handler = SaveToDirHandler(path_dir_logs)
+            data_handler.addConverter(TextConverter()).addConverter(NumpyArrayConverter())
+            data_handler.addConverter(DataclassConverter())
+            data_handler.path_generator = path_generator
+            pickle_handler = SaveToDirHandler(path_dir_logs).addConverter(PickleConverter()).setLevel(logging.ERROR)
+            pickle_handler.path_generator = path_generator
+
+            logger = DataLogger('TestScript', logging.DEBUG)
+            logger.addHandler(data_handler)
+            logger.addHandler(pickle_handler)
+
+            array = np.arange(12, dtype=np.float32).reshape((3, 4))
+            logger.debug('Some string data', data='Text')
+            logger.info('Some array', data=array)
+            logger.warning('Some dataclass', data=SomeDataObject(12, 'unet'))
+            logger.error('Some dict', data={'a': [1, 2]})
+
+            with SaveToDirReader(path_dir_logs) as reader:
+                self.assertEqual(reader.update(), 4)
+                self.assertEqual(reader.update(), 0)
+
+                records = list(reader.records())
+                self.assertEqual([record.message for record in records],
+                                 ['Some string data', 'Some array', 'Some dataclass', 'Some dict'])
+                self.assertEqual([record.level for record in records],
+                                 [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR])
+                self.assertEqual(records[0].data, 'Text')
+                np.testing.assert_array_equal(records[1].data, array)
+                self.assertEqual(records[2].data, asdict(SomeDataObject(12, 'unet')))
+                self.assertEqual(records[3].data, {'a': [1, 2]})
+
+                self.assertEqual([r.message for r in reader.records(level_min=logging.WARNING)],
+                                 ['Some dataclass', 'Some dict'])
+                self.assertEqual([r.message for r in reader.records(message='Some d*', level_max=logging.WARNING)],
+                                 ['Some dataclass'])
+                self.assertEqual([r.message for r in reader.records(time_start=records[0].timestamp + 3600)], [])
+
+            logger_other = DataLogger('OtherScript', logging.DEBUG)
+            logger_other.addHandler(data_handler)
+            logger_other.debug('Other string data', data='Other')
+
+            with SaveToDirReader(path_dir_logs) as reader:
+                self.assertEqual(reader.update(), 1)
+                self.assertEqual([r.data for r in reader.records(message='Other*')], ['Other'])
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+
+class CountingTextConverter(TextConverter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_conversions = 0
+
+    def to_buffer(self, obj: str) -> bytes:
+        self.n_conversions += 1
+        return super().to_buffer(obj)
+
+
+class ListHandler(DataHandlerBase):
+    def __init__(self):
+        super().__init__()
+        self.msgs = []
+
+    def handle(self, level, msg, data, logger) -> None:
+        self.msgs.append(msg)  # Atomic
+
+
+def write_unique_records(path_dir_logs, n_threads, n_records):
+    data_handler = SaveToDirHandler(path_dir_logs).addConverter(TextConverter())
+    data_handler.path_generator.prefix_generator = PrefixGeneratorProcessUnique()
+    data_handler.should_overwrite = False
+
+    logger = DataLogger('Worker', logging.DEBUG)
+    logger.addHandler(data_handler)
+
+    def write_records():
+        for i in range(n_records):
+            logger.debug('Record', data='Text {}'.format(i))
+
+    threads = [threading.Thread(target=write_records) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
 
 @dataclass
 class SomeDataObject:
@@ -186,6 +746,12 @@ class SomeDataObject:
     backbone: str
 
 
+@dataclass
+class SomeNestedDataObject:
+    name: str
+    layers: list = field(default_factory=list)
+
+
 class DemoComponent:
     def __init__(self) -> None:
         self.logger = DataLogger(name='DemoComponent')
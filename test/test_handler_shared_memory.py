@@ -0,0 +1,124 @@
+import logging
+import multiprocessing
+import os
+import sys
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from log_utils.data_logger import DataLogger
+from log_utils.data_logger.handlers import DataHandlerBase
+
+if sys.version_info >= (3, 8):
+    from log_utils.data_logger.handler_shared_memory import SharedMemoryReceiver
+
+
+@skipIf(sys.version_info < (3, 8), 'multiprocessing.shared_memory requires Python 3.8+')
+class TestSharedMemory(TestCase):
+    def test_workers(self):
+        """
+            Arrays of worker processes are handled by the central logger, zero-copy
+        """
+        handler_central = CopyingHandler()
+        logger_central = DataLogger('Central', logging.DEBUG)
+        logger_central.addHandler(handler_central)
+
+        context = multiprocessing.get_context('spawn')
+        receiver = SharedMemoryReceiver(logger_central, context)
+
+        n_workers, n_records = 2, 20
+        workers = [
+            context.Process(
+                target=work, args=(receiver.create_handler(max_blocks=2, min_block_size=1024), worker_id, n_records)
+            )
+            for worker_id in range(n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        receiver.run()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+        self.assertEqual(len(handler_central.records), n_workers * (n_records + 1))
+        for worker_id in range(n_workers):
+            records = [record for record in handler_central.records if record[0] == 'Worker {}'.format(worker_id)]
+            for i, (_, msg, data, is_writeable) in enumerate(records[:-1]):
+                self.assertEqual(msg, 'Array {}'.format(i))
+                self.assertTrue(np.array_equal(data, make_array(worker_id, i)))
+                self.assertFalse(is_writeable)
+
+            self.assertEqual(records[-1][2], {'worker_id': worker_id})
+
+    @skipIf(not os.path.isdir('/dev/shm'), 'Shared memory blocks are listed in /dev/shm')
+    def test_crashed_worker(self):
+        """
+            A worker that exits without closing its handler doesn't block the receiver, nor leak its blocks
+        """
+        handler_central = CopyingHandler()
+        logger_central = DataLogger('Central', logging.DEBUG)
+        logger_central.addHandler(handler_central)
+
+        def list_blocks():
+            return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')}
+
+        names_before = list_blocks()
+
+        context = multiprocessing.get_context('spawn')
+        receiver = SharedMemoryReceiver(logger_central, context)
+        worker = context.Process(target=work_and_crash, args=(receiver.create_handler(min_block_size=1024),))
+        worker.start()
+
+        receiver.run([worker], poll_interval_sec=0.1)
+        worker.join()
+
+        self.assertEqual(worker.exitcode, 1)
+        self.assertEqual(len(handler_central.records), 1)
+        self.assertTrue(np.array_equal(handler_central.records[0][2], make_array(0, 0)))
+        self.assertEqual(list_blocks() - names_before, set())
+
+
+class CopyingHandler(DataHandlerBase):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def handle(self, level, msg, data, logger) -> None:
+        if isinstance(data, np.ndarray):
+            self.records.append((logger.name, msg, data.copy(), data.flags.writeable))
+        else:
+            self.records.append((logger.name, msg, data, None))
+
+
+def make_array(worker_id, i):
+    # Sizes vary, so blocks are replaced by larger ones
+    return np.full((10 * (i + 1), 100), worker_id * 1000 + i, dtype=np.float32)
+
+
+def work(handler, worker_id, n_records):
+    logger = DataLogger('Worker {}'.format(worker_id), logging.DEBUG)
+    logger.addHandler(handler)
+
+    for i in range(n_records):
+        logger.debug('Array {}'.format(i), data=lambda: make_array(worker_id, i))
+    logger.debug('Not an array', data={'worker_id': worker_id})
+
+    handler.close()
+
+
+def work_and_crash(handler):
+    logger = DataLogger('Worker', logging.DEBUG)
+    logger.addHandler(handler)
+    logger.debug('Array', data=make_array(0, 0))
+
+    # Exit abruptly once the record was sent, without closing the handler
+    # noinspection PyProtectedMember
+    handler._queue_records.close()
+    # noinspection PyProtectedMember
+    handler._queue_records.join_thread()
+    os._exit(1)
+
+
+if __name__ == '__main__':
+    TestSharedMemory().test_workers()
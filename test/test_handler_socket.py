@@ -0,0 +1,119 @@
+import logging
+import os
+import shutil
+import socket
+import time
+from pathlib import Path
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from log_utils.data_logger import DataLogger
+from log_utils.data_logger.converters import TextConverter, BinaryConverter, PickleConverter
+from log_utils.data_logger.handler_socket import SocketDataHandler, DataCollector, encode_frame
+from log_utils.data_logger.handlers import SaveToDirHandler, PrefixGeneratorCounting
+
+
+class TestSocketDataHandler(TestCase):
+    @staticmethod
+    def wait_for_files(path_dir, pattern, count, timeout_sec=5.0):
+        time_end = time.monotonic() + timeout_sec
+        while len(list(path_dir.glob(pattern))) < count and time.monotonic() < time_end:
+            time.sleep(0.01)
+
+        return sorted(path_dir.glob(pattern))
+
+    def test_loopback_tcp(self):
+        path_dir_logs = Path(mkdtemp())
+        try:
+            data_handler_collector = SaveToDirHandler(path_dir_logs)
+            data_handler_collector.path_generator.prefix_generator = PrefixGeneratorCounting()
+            collector = DataCollector(('127.0.0.1', 0), [data_handler_collector]).start()
+
+            logger = DataLogger('Worker', logging.DEBUG)
+            data_handler = SocketDataHandler(collector.address, batch_size=8)
+            data_handler.addConverter(TextConverter()).addConverter(BinaryConverter())
+            logger.addHandler(data_handler)
+
+            for i in range(20):
+                logger.debug('Text record', data='Text {}'.format(i))
+            logger.debug('Binary record', data=b'\x00\x01')
+            data_handler.close()
+
+            paths = self.wait_for_files(path_dir_logs, '*.txt', 20)
+            collector.close()
+
+            self.assertEqual(len(paths), 20)
+            self.assertEqual(paths[0].name, '000 DEBUG Text record.txt')
+            self.assertEqual(paths[0].read_text(), 'Text 0')
+            self.assertEqual(len(list(path_dir_logs.glob('*.bin'))), 1)
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_reconnect_unix(self):
+        """
+            Records logged while the collector is down are kept, and sent once it's up
+        """
+        if os.name == 'nt':
+            self.skipTest('Unix sockets are unavailable')
+
+        path_dir_logs = Path(mkdtemp())
+        try:
+            path_socket = str(path_dir_logs / 'collector.sock')
+
+            logger = DataLogger('Worker', logging.DEBUG)
+            data_handler = SocketDataHandler(path_socket, max_buffered_records=5, backpressure_timeout_sec=0)
+            data_handler.addConverter(TextConverter())
+            logger.addHandler(data_handler)
+
+            for i in range(10):
+                logger.debug('Text record {}'.format(i), data='Text {}'.format(i))
+            self.assertTrue(data_handler.n_dropped > 0)
+            n_sent = 10 - data_handler.n_dropped
+
+            path_dir_collected = path_dir_logs / 'collected'
+            collector = DataCollector(path_socket, [SaveToDirHandler(path_dir_collected)]).start()
+            data_handler.close()
+
+            paths = self.wait_for_files(path_dir_collected, '*.txt', n_sent)
+            collector.close()
+
+            self.assertEqual(len(paths), n_sent)
+            self.assertFalse(os.path.exists(path_socket))
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_record_buffers(self):
+        """
+            The buffers of a record are saved under a single name, remote extensions can't leave the directory
+            Local converters (e.g. pickle) don't convert the received records again
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            data_handler_collector = SaveToDirHandler(path_dir_logs / 'collected').addConverter(PickleConverter())
+            data_handler_collector.path_generator.prefix_generator = PrefixGeneratorCounting()
+            collector = DataCollector(('127.0.0.1', 0), [data_handler_collector]).start()
+
+            meta = {'name': 'Worker', 'level': logging.DEBUG, 'time': time.time()}
+            with socket.create_connection(collector.address) as sock:
+                sock.sendall(encode_frame(dict(meta, msg='Record'), [('.txt', b'Text'), ('.pickle', b'Pickle')]))
+                sock.sendall(encode_frame(dict(meta, msg='Escape'), [('/../../escaped', b'Text')]))
+                sock.sendall(encode_frame(dict(meta, msg='After'), [('.txt', b'Text')]))
+
+            paths = self.wait_for_files(path_dir_logs / 'collected', '*', 4)
+            collector.close()
+
+            self.assertEqual([path.name for path in paths], [
+                '000 DEBUG Record.pickle', '000 DEBUG Record.txt', '001 DEBUG Escape_.._.._escaped',
+                '002 DEBUG After.txt'
+            ])
+            self.assertEqual((path_dir_logs / 'collected' / '000 DEBUG Record.pickle').read_bytes(), b'Pickle')
+            self.assertEqual(sorted(path.name for path in path_dir_logs.iterdir()), ['collected'])
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+
+if __name__ == '__main__':
+    TestSocketDataHandler().test_loopback_tcp()
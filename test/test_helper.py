@@ -1,7 +1,17 @@
+import gzip
 import logging
+import pstats
+import shutil
+import threading
+import time
+from pathlib import Path
+from tempfile import mkdtemp
 from unittest import TestCase
 
-from log_utils.helper import LogHelper
+from log_utils.data_logger import DataLogger
+from log_utils.data_logger.converter_profile import PstatsConverter, CollapsedStackConverter
+from log_utils.data_logger.handlers import SaveToDirHandler, DataHandlerBase
+from log_utils.helper import LogHelper, PerformanceProfiler, CompressingRotatingFileHandler, ThreadLocalAccumulator
 
 
 class TestHelper(TestCase):
@@ -20,6 +30,179 @@ class TestHelper(TestCase):
         logger.error('Sample Message')
         logger.critical('Sample Message')
 
+    def test_profiler(self):
+        """
+            Only some of the invocations are profiled, the profiles are saved as data
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            logger = DataLogger('TestScript', logging.DEBUG)
+            logger.addHandler(
+                SaveToDirHandler(path_dir_logs).addConverter(PstatsConverter()).addConverter(CollapsedStackConverter())
+            )
+
+            profiler = PerformanceProfiler(logger, 'Work', every_n=10, threshold_sec=0.02)
+
+            @profiler
+            def work(duration_sec=0.0):
+                time.sleep(duration_sec)
+                return sum(range(1000))
+
+            for _ in range(25):
+                self.assertEqual(work(), sum(range(1000)))
+
+            self.assertEqual(profiler.n_profiled, 2)
+
+            # A slow invocation triggers profiling of the next one
+            work(0.03)
+            work()
+            self.assertEqual(profiler.n_profiled, 3)
+
+            paths = list(path_dir_logs.glob('*.pstats'))
+            self.assertEqual(len(paths), 3)
+            stats = pstats.Stats(str(paths[0]))
+            self.assertTrue(any(function_name == 'work' for _, _, function_name in stats.stats))
+
+            profiler_sampler = PerformanceProfiler(
+                logger, 'Sleep', every_n=1, mode=PerformanceProfiler.MODE_SAMPLER, sampling_interval_sec=0.001
+            )
+            with profiler_sampler:
+                time.sleep(0.05)
+
+            paths = list(path_dir_logs.glob('*.folded'))
+            self.assertEqual(len(paths), 1)
+            self.assertIn('test_helper.py:test_profiler', paths[0].read_text())
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+    def test_profiler_concurrency(self):
+        """
+            A single cProfile profile is taken at a time - nested and concurrent profilers skip profiling meanwhile
+        """
+        logger = DataLogger('TestScript', logging.DEBUG)
+        handler = ListHandler()
+        logger.addHandler(handler)
+
+        def inner_work():
+            return sum(range(1000))
+
+        def outer_work():
+            return sum(range(1000))
+
+        profiler_outer = PerformanceProfiler(logger, 'Outer', every_n=1)
+        profiler_inner = PerformanceProfiler(logger, 'Inner', every_n=1)
+        with profiler_outer:
+            with profiler_inner:
+                inner_work()
+            outer_work()
+
+        self.assertEqual((profiler_outer.n_profiled, profiler_inner.n_profiled), (1, 0))
+        function_names = [function_name for _, _, function_name in handler.records[0][2].stats]
+        self.assertIn('inner_work', function_names)
+        self.assertIn('outer_work', function_names)
+
+        # Profiled again once the outer profile is done
+        with profiler_inner:
+            inner_work()
+        self.assertEqual(profiler_inner.n_profiled, 1)
+
+        errors = []
+
+        def work_in_thread():
+            profiler = PerformanceProfiler(logger, 'Thread', every_n=1)
+            # noinspection PyBroadException
+            try:
+                for _ in range(20):
+                    with profiler:
+                        time.sleep(0.001)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work_in_thread) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with profiler_outer:
+            outer_work()
+        self.assertEqual(profiler_outer.n_profiled, 2)
+
+    def test_thread_local_accumulator(self):
+        """
+            The cells of finished threads are merged as new threads add values, even if the sum is never read
+        """
+        accumulator = ThreadLocalAccumulator(1.0)
+        for _ in range(50):
+            thread = threading.Thread(target=accumulator.add, args=(2.0,))
+            thread.start()
+            thread.join()
+
+        # noinspection PyProtectedMember
+        self.assertEqual(len(accumulator._cells), 1)
+        self.assertEqual(accumulator.value, 101.0)
+
+        accumulator.value = 0.0
+        accumulator.add(3.0)
+        self.assertEqual(accumulator.value, 3.0)
+
+    def test_compressing_rotating_file_handler(self):
+        """
+            Rotated logs are compressed in the background, size-based rollovers don't overwrite each other
+        """
+        path_dir_logs = Path(mkdtemp())
+        try:
+            path_log_file = path_dir_logs / 'script.log'
+            handler = LogHelper.generate_compressing_rotating_file_handler(
+                str(path_log_file), files_count=100, max_bytes=1000
+            )
+            self.assertIsInstance(handler, CompressingRotatingFileHandler)
+
+            logger = logging.getLogger('TestCompression')
+            logger.propagate = False
+            logger.setLevel(logging.DEBUG)
+            logger.addHandler(handler)
+
+            for i in range(500):
+                logger.info('Line {}'.format(i))
+            handler.flush_compression()
+
+            paths_compressed = list(path_dir_logs.glob('script.log.*.gz'))
+            self.assertTrue(len(paths_compressed) > 10)
+            self.assertEqual(list(path_dir_logs.glob('script.log.*[0-9]')), [])
+
+            lines = path_log_file.read_text().splitlines()
+            for path in paths_compressed:
+                lines += gzip.decompress(path.read_bytes()).decode().splitlines()
+            self.assertEqual(len(lines), 500)
+
+            # Retention counts the compressed backups, and keeps files that only share the prefix
+            paths_siblings = [path_dir_logs / 'script.log.lock', path_dir_logs / 'script.log.jsonl']
+            for path in paths_siblings:
+                path.write_text('Not a backup')
+
+            handler.backupCount = 3
+            logger.info('Line' * 300)
+            handler.close()
+            self.assertEqual(len(list(path_dir_logs.glob('script.log.*.gz'))), 3)
+            for path in paths_siblings:
+                self.assertTrue(path.exists())
+            logger.removeHandler(handler)
+
+        finally:
+            shutil.rmtree(str(path_dir_logs))
+
+
+class ListHandler(DataHandlerBase):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def handle(self, level, msg, data, logger) -> None:
+        self.records.append((level, msg, data))
+
 
 if __name__ == '__main__':
     TestHelper().test_nominal()
@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from log_utils.helper import PerformanceMetric
+from log_utils.metric_registry import MetricRegistry
+
+
+class TestMetricRegistry(TestCase):
+    def test_nominal(self):
+        registry = MetricRegistry(n_samples=10, capacity=2)
+        metrics = [registry.metric('Metric {}'.format(i), units_suffix='px') for i in range(5)]
+        reference = [PerformanceMetric(n_samples=10, units_suffix='px', name='Metric {}'.format(i)) for i in range(5)]
+
+        for i in range(25):
+            for metric, metric_reference in zip(metrics[:4], reference[:4]):
+                metric.submit_sample(i * 0.5)
+                metric_reference.submit_sample(i * 0.5)
+
+        self.assertIs(registry.metric('Metric 0'), metrics[0])
+        for metric, metric_reference in zip(metrics, reference):
+            self.assertEqual(str(metric), str(metric_reference))
+            self.assertEqual(metric.last_str(), metric_reference.last_str())
+
+        averages = registry.averages()
+        self.assertTrue(np.allclose(averages[:4], np.arange(15, 25).mean() * 0.5))
+        self.assertTrue(np.isnan(averages[4]))
+
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['Metric 0'], dict(average=averages[0], last=12.0, n_samples=10))
+        self.assertEqual(len(registry.report().splitlines()), 5)
+
+        registry.reset(['Metric 0'])
+        self.assertEqual(metrics[0].n_samples, 0)
+        self.assertEqual(metrics[1].n_samples, 10)
+
+        registry.reset()
+        self.assertEqual(registry.counts.sum(), 0)
+
+    def test_timer(self):
+        registry = MetricRegistry()
+        for _ in range(3):
+            with registry.timer('Sleep'):
+                time.sleep(0.01)
+
+        self.assertEqual(registry['Sleep'].n_samples, 3)
+        self.assertTrue(registry['Sleep'].average >= 0.01)
+
+        registry.metric('Batch size')
+        with self.assertRaises(TypeError):
+            registry.timer('Batch size')
+
+    def test_threads(self):
+        """
+            Samples aren't lost while other threads create metrics (and grow the registry)
+        """
+        registry = MetricRegistry(n_samples=10000, capacity=1)
+        metric = registry.metric('Shared')
+
+        def submit_samples():
+            for _ in range(2000):
+                metric.submit_sample(1.0)
+
+        def create_metrics(i_thread):
+            for i in range(200):
+                registry.metric('Metric {}-{}'.format(i_thread, i))
+
+        threads = [threading.Thread(target=submit_samples) for _ in range(4)]
+        threads += [threading.Thread(target=create_metrics, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(registry), 401)
+        self.assertEqual(metric.n_samples, 8000)
+        self.assertEqual(metric.average, 1.0)
+
+
+if __name__ == '__main__':
+    TestMetricRegistry().test_nominal()